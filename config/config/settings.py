@@ -46,8 +46,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'expenses.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'expenses.middleware.QueryInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -78,6 +80,8 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
+# config.settings_production swaps in a SQLite profile for concurrent writers
+# (WAL, busy timeout, BEGIN IMMEDIATE, persistent connections).
 
 DATABASES = {
     'default': {
@@ -87,6 +91,91 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Group detail and balances responses are cached per group revision, so any
+# backend works here (locmem, file based, memcached, redis).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'expense-splitter',
+    },
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'expense-splitter-auth',
+        'TIMEOUT': 60,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+GROUP_CACHE_ALIAS = 'default'
+GROUP_CACHE_TIMEOUT = 300
+
+# Authenticated users are resolved from AUTH_USER_CACHE_ALIAS instead of one
+# SELECT per request. Entries are dropped whenever the user is saved or
+# deleted; with a per-process backend such as locmem, other processes pick up
+# the change after at most AUTH_USER_CACHE_TIMEOUT seconds, so use a shared
+# backend when running several workers, as config.settings_production does.
+
+AUTH_USER_CACHE_ALIAS = 'auth'
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Balance engine: rebuild_balances and seed_workload sum net balances in
+# integer cents, and the settlement solvers work in cents. With NumPy
+# installed, BALANCE_ENGINE_NUMPY accumulates large ledgers with np.add.at
+# instead of a dict loop; from row tuples that was not faster on CPython in
+# benchmark_engine, so it is off by default.
+
+BALANCE_ENGINE_NUMPY = False
+
+# Every expense and settlement is also appended to a per-group event ledger
+# (LedgerEvent). Every LEDGER_SNAPSHOT_INTERVAL events the nets are
+# checkpointed (BalanceSnapshot), so balances at any point are the closest
+# snapshot plus at most that many events. `manage.py verify_ledger` checks
+# the ledger against a full recomputation.
+
+LEDGER_SNAPSHOT_INTERVAL = 500
+
+# Member user ids per group, kept in process memory (LRU, tagged with the
+# group's membership revision) for membership checks and payer/split validation.
+
+MEMBERSHIP_CACHE_SIZE = 1024
+
+
+# Settlement suggestions: "exact" minimizes the number of transfers within
+# the size/time budget and falls back to "greedy" (largest debtor pays
+# largest creditor). A dotted path to a custom solver also works.
+
+SETTLEMENT_SOLVER = 'exact'
+SETTLEMENT_EXACT_MAX_SIZE = 12
+SETTLEMENT_TIME_BUDGET_MS = 100
+
+
+# Per-request SQL instrumentation: Server-Timing headers plus one JSON log
+# line per request on the expenses.queries logger. Requests that run the
+# same SQL shape at least QUERY_N_PLUS_ONE_THRESHOLD times are logged as
+# warnings.
+
+QUERY_INSTRUMENTATION = True
+QUERY_N_PLUS_ONE_THRESHOLD = 10
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'expenses.queries': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -127,7 +216,7 @@ STATIC_URL = 'static/'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'expenses.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
@@ -0,0 +1,75 @@
+"""
+Production settings: the development settings plus a SQLite profile tuned
+for concurrent writers and an authenticated user cache shared by all worker
+processes.
+
+Select it with DJANGO_SETTINGS_MODULE=config.settings_production.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DEBUG = False
+
+
+# SQLite under concurrent writers
+# https://docs.djangoproject.com/en/6.0/ref/databases/#sqlite-notes
+#
+# WAL lets readers keep going while one writer commits, and with it
+# synchronous=NORMAL only fsyncs at checkpoints instead of on every commit.
+# Every transaction.atomic() block in the app writes, so all of them start
+# with BEGIN IMMEDIATE: the write lock is taken up front, while the busy
+# timeout still applies, instead of being upgraded from a read lock halfway
+# through, which SQLite refuses with "database is locked" straight away.
+# select_for_update() is a no-op on SQLite; the immediate transaction is what
+# serializes the ledger read-modify-write there.
+#
+# Connections (and the pragmas they run) are reused by the threaded WSGI
+# workers for CONN_MAX_AGE seconds. Check the profile with
+# `manage.py stress_sqlite`.
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA mmap_size=268435456;'
+                'PRAGMA cache_size=-65536;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        },
+    }
+}
+
+
+# Authenticated user cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/#filesystem-caching
+#
+# Every worker process must see the same entries, or a deactivated or edited
+# user stays cached in the other processes until the entry times out. The
+# filesystem cache is shared by all workers on the host without another
+# service; point AUTH_USER_CACHE_ALIAS at memcached or redis instead when the
+# workers span several hosts.
+#
+# Entries are pickled User rows, password hashes included, so they live
+# outside the project tree, in a directory Django creates readable by the
+# server's user only. Set AUTH_USER_CACHE_DIR to move it.
+
+CACHES = {
+    **CACHES,  # noqa: F405
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('AUTH_USER_CACHE_DIR', '/var/tmp/expenses-auth-cache'),
+        'TIMEOUT': 60,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
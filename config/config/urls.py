@@ -17,10 +17,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import(SpectacularAPIView, SpectacularSwaggerView)
+from expenses.views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('expenses.urls')),
+    path('metrics', metrics_view, name='metrics'),
 
     path('api/schema', SpectacularAPIView.as_view(), name='schema'),
      path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui',
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ExpensesConfig(AppConfig):
     name = 'expenses'
+
+    def ready(self):
+        # Connects the receivers that drop cached users on save/delete.
+        from . import authentication  # noqa: F401
@@ -0,0 +1,179 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db.models import Sum
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import APIException
+
+from .authentication import CachedJWTAuthentication
+from .balances import ZERO
+from .caching import acached_group_data, etag_matches, group_etag
+from .ledger import parse_as_of
+from .membership import ais_group_member
+from .models import Expense, Group, GroupMember, MemberBalance, Settlement
+from .pagination import ExpenseCursorPagination
+from .serializers import ExpenseSerializer, GroupDetailSerializer
+from .views import GroupBalancesView
+
+
+# Async counterparts of GroupDetailAPIView, GroupExpenseListView and
+# GroupBalancesView for ASGI deployments. They return the same payloads,
+# ETags and cache entries. Django's async ORM still runs each query on the
+# request's sync thread, so gathered queries overlap their Python work but
+# not their database time.
+
+
+def _error(detail, status, headers=None):
+    data = detail if isinstance(detail, (list, dict)) else {"detail": detail}
+    return JsonResponse(data, status=status, safe=False, headers=headers)
+
+
+async def _load_group(request, id):
+    try:
+        result = await sync_to_async(CachedJWTAuthentication().authenticate)(request)
+    except APIException as exc:
+        return None, _error(exc.detail, exc.status_code, {"WWW-Authenticate": 'Bearer realm="api"'})
+    if result is None:
+        return None, _error(
+            "Authentication credentials were not provided.",
+            401,
+            {"WWW-Authenticate": 'Bearer realm="api"'},
+        )
+    user = result[0]
+
+    try:
+        group = await Group.objects.aget(id=id)
+    except Group.DoesNotExist:
+        return None, _error("No Group matches the given query.", 404)
+
+    if not await ais_group_member(group, user.id):
+        return None, _error("Not a group member", 403)
+    return group, None
+
+
+def _with_etag(response, etag):
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _not_modified(etag):
+    return _with_etag(HttpResponse(status=304), etag)
+
+
+async def _members(group):
+    return [
+        member
+        async for member in GroupMember.objects.filter(group=group).select_related("user")
+    ]
+
+
+@require_safe
+async def group_detail(request, id):
+    group, error = await _load_group(request, id)
+    if error:
+        return error
+
+    etag = group_etag(group, "detail", request)
+    if etag_matches(request, etag):
+        return _not_modified(etag)
+
+    async def build():
+        members, totals = await asyncio.gather(
+            _members(group),
+            Expense.objects.filter(group=group).aaggregate(total=Sum("amount")),
+        )
+        context = {"members": members, "total_expense": totals["total"] or 0}
+        return GroupDetailSerializer(group, context=context).data
+
+    data = await acached_group_data(group, "detail", build)
+    return _with_etag(JsonResponse(data), etag)
+
+
+@require_safe
+async def group_expenses(request, id):
+    group, error = await _load_group(request, id)
+    if error:
+        return error
+
+    etag = group_etag(group, "expenses", request)
+    if etag_matches(request, etag):
+        return _not_modified(etag)
+
+    expenses = (
+        Expense.objects.filter(group=group)
+        .select_related("paid_by")
+        .prefetch_related("payments__user")
+    )
+
+    paginator = ExpenseCursorPagination(request)
+    if not paginator.is_requested():
+        rows = [expense async for expense in expenses.order_by("-created_at")]
+        data = ExpenseSerializer(rows, many=True).data
+        return _with_etag(JsonResponse(data, safe=False), etag)
+
+    try:
+        page, next_cursor = await paginator.apaginate(expenses)
+    except ValueError as e:
+        return _error(str(e), 400)
+
+    data = {"results": ExpenseSerializer(page, many=True).data, "next_cursor": next_cursor}
+    return _with_etag(JsonResponse(data), etag)
+
+
+@require_safe
+async def group_balances(request, id):
+    group, error = await _load_group(request, id)
+    if error:
+        return error
+
+    as_of = request.GET.get("as_of")
+    if as_of is not None:
+        try:
+            as_of = parse_as_of(as_of)
+        except ValueError as e:
+            return _error(str(e), 400)
+
+    etag = group_etag(group, "balances", request)
+    if etag_matches(request, etag):
+        return _not_modified(etag)
+
+    if as_of is not None:
+        build_as_of = sync_to_async(GroupBalancesView()._build_balances_as_of)
+        data = await acached_group_data(
+            group, f"balances@{as_of.isoformat()}", lambda: build_as_of(group, as_of)
+        )
+        return _with_etag(JsonResponse(data), etag)
+
+    async def build():
+        # Members, the balance ledger and the settlement history do not
+        # depend on each other.
+        members, stored, history = await asyncio.gather(
+            _members(group),
+            _stored_net(group),
+            _settlement_history(group),
+        )
+        net = {member.user_id: stored.get(member.user_id, ZERO) for member in members}
+        return GroupBalancesView()._balances_payload(group, members, net, history)
+
+    data = await acached_group_data(group, "balances", build)
+    return _with_etag(JsonResponse(data), etag)
+
+
+async def _stored_net(group):
+    return {
+        user_id: amount
+        async for user_id, amount in MemberBalance.objects.filter(group=group).values_list(
+            "user_id", "net_amount"
+        )
+    }
+
+
+async def _settlement_history(group):
+    return [
+        settlement
+        async for settlement in Settlement.objects.filter(group=group).select_related(
+            "from_user", "to_user"
+        )
+    ]
@@ -0,0 +1,338 @@
+from decimal import Decimal
+
+from django.db.models import F, Q, Sum, Value
+
+from .models import (
+    ExpensePayment,
+    ExpenseSplit,
+    MemberBalance,
+    PairwiseDebt,
+    Settlement,
+    UserBalanceSummary,
+)
+
+
+ZERO = Decimal("0.00")
+
+
+def expense_deltas(payments, splits):
+    deltas = {}
+    for payment in payments:
+        deltas[payment.user_id] = deltas.get(payment.user_id, ZERO) + payment.amount
+    for split in splits:
+        deltas[split.user_id] = deltas.get(split.user_id, ZERO) - split.share_amount
+    return deltas
+
+
+def settlement_deltas(settlement):
+    return {
+        settlement.from_user_id: settlement.amount,
+        settlement.to_user_id: -settlement.amount,
+    }
+
+
+def match_debts(net):
+    # Users who are behind owe users who are ahead, largest amounts first, so
+    # each user's pairs add up to their amount. Whatever does not balance out
+    # is left unmatched.
+    debtors = sorted(
+        ((-amount, uid) for uid, amount in net.items() if amount < 0),
+        key=lambda item: (-item[0], item[1]),
+    )
+    creditors = sorted(
+        ((amount, uid) for uid, amount in net.items() if amount > 0),
+        key=lambda item: (-item[0], item[1]),
+    )
+
+    deltas = {}
+    d = c = 0
+    while d < len(debtors) and c < len(creditors):
+        owed, debtor_id = debtors[d]
+        due, creditor_id = creditors[c]
+        amount = min(owed, due)
+        deltas[(debtor_id, creditor_id)] = amount
+        debtors[d] = (owed - amount, debtor_id)
+        creditors[c] = (due - amount, creditor_id)
+        if owed == amount:
+            d += 1
+        if due == amount:
+            c += 1
+    return deltas
+
+
+def expense_pair_deltas(payments, splits):
+    return match_debts(expense_deltas(payments, splits))
+
+
+def settlement_pair_deltas(settlement):
+    return {(settlement.from_user_id, settlement.to_user_id): -settlement.amount}
+
+
+def apply_pair_deltas(group, deltas):
+    # Rows always hold what match_debts gives for the group's balances: at
+    # most one row per pair of users, always with a positive amount, nobody
+    # both owes and is owed, and fewer rows than members with a balance. A
+    # user's rows therefore add up to their net balance and a settled user has
+    # none. The group's rows already sum to its balances, so the new rows are
+    # matched from them plus the deltas, and the cost of a write follows the
+    # number of members rather than the group's history.
+    net = {}
+    for (debtor_id, creditor_id), amount in deltas.items():
+        if debtor_id != creditor_id and amount:
+            net[debtor_id] = net.get(debtor_id, ZERO) - amount
+            net[creditor_id] = net.get(creditor_id, ZERO) + amount
+    if not any(net.values()):
+        return
+
+    current = {}
+    for pk, debtor_id, creditor_id, amount in (
+        PairwiseDebt.objects.select_for_update()
+        .filter(group=group)
+        .order_by("id")
+        .values_list("pk", "debtor_id", "creditor_id", "amount")
+    ):
+        current[(debtor_id, creditor_id)] = (pk, amount)
+        net[debtor_id] = net.get(debtor_id, ZERO) - amount
+        net[creditor_id] = net.get(creditor_id, ZERO) + amount
+    target = match_debts(net)
+
+    # Only rows whose pair or amount changed are rewritten. Deleting and
+    # inserting them is far cheaper than a bulk_update when a write reshuffles
+    # most of a large group.
+    stale = [pk for key, (pk, amount) in current.items() if target.get(key) != amount]
+    if stale:
+        PairwiseDebt.objects.filter(pk__in=stale).delete()
+    created = [
+        PairwiseDebt(group=group, debtor_id=debtor_id, creditor_id=creditor_id, amount=amount)
+        for (debtor_id, creditor_id), amount in target.items()
+        if current.get((debtor_id, creditor_id), (None, None))[1] != amount
+    ]
+    if created:
+        PairwiseDebt.objects.bulk_create(created)
+
+
+def locked_member_net(group, user_ids):
+    return dict(
+        MemberBalance.objects.select_for_update()
+        .filter(group=group, user_id__in=user_ids)
+        .order_by("user_id")
+        .values_list("user_id", "net_amount")
+    )
+
+
+def user_debts(group, user):
+    return (
+        PairwiseDebt.objects.filter(group=group)
+        .filter(Q(debtor=user) | Q(creditor=user))
+        .select_related("debtor", "creditor")
+        .order_by("-amount")
+    )
+
+
+def apply_balance_deltas(group, deltas):
+    # Must run inside the transaction that writes the payments, splits or
+    # settlement the deltas came from, so the ledger never drifts from history.
+    deltas = {uid: amount for uid, amount in deltas.items() if amount}
+    if not deltas:
+        return
+
+    rows = {
+        row.user_id: row
+        for row in MemberBalance.objects.select_for_update()
+        .filter(group=group, user_id__in=deltas.keys())
+        .order_by("user_id")
+    }
+
+    changed = []
+    created = []
+    rollup = {}
+    for uid, amount in deltas.items():
+        row = rows.get(uid)
+        if row is None:
+            old = ZERO
+            created.append(MemberBalance(group=group, user_id=uid, net_amount=amount))
+        else:
+            old = row.net_amount
+            row.net_amount += amount
+            changed.append(row)
+        new = old + amount
+        rollup[uid] = (
+            max(new, ZERO) - max(old, ZERO),
+            max(-new, ZERO) - max(-old, ZERO),
+        )
+
+    if changed:
+        MemberBalance.objects.bulk_update(changed, ["net_amount"])
+    if created:
+        MemberBalance.objects.bulk_create(created)
+    _apply_user_rollup(group.currency, rollup)
+
+
+def _apply_user_rollup(currency, rollup):
+    # Summary rows are shared by every group in the currency, so no group lock
+    # covers them. Missing rows are inserted first (a concurrent first write
+    # for the same user simply wins the insert), then all rows are locked in
+    # user order so writers touching overlapping users cannot deadlock.
+    rollup = {uid: change for uid, change in rollup.items() if change[0] or change[1]}
+    if not rollup:
+        return
+
+    user_ids = sorted(rollup)
+    UserBalanceSummary.objects.bulk_create(
+        [UserBalanceSummary(user_id=uid, currency=currency) for uid in user_ids],
+        ignore_conflicts=True,
+    )
+    rows = list(
+        UserBalanceSummary.objects.select_for_update()
+        .filter(currency=currency, user_id__in=user_ids)
+        .order_by("user_id")
+    )
+    for row in rows:
+        owed, owing = rollup[row.user_id]
+        row.total_owed += owed
+        row.total_owing += owing
+    UserBalanceSummary.objects.bulk_update(rows, ["total_owed", "total_owing"])
+
+
+def load_member_net(group, members):
+    stored = dict(
+        MemberBalance.objects.filter(group=group).values_list("user_id", "net_amount")
+    )
+    return {member.user_id: stored.get(member.user_id, ZERO) for member in members}
+
+
+def rebuild_member_balances(group, net):
+    MemberBalance.objects.filter(group=group).delete()
+    MemberBalance.objects.bulk_create(
+        [
+            MemberBalance(group=group, user_id=uid, net_amount=amount.quantize(Decimal("0.01")))
+            for uid, amount in net.items()
+        ]
+    )
+
+
+def rebuild_user_summaries(user_ids=None):
+    balances = MemberBalance.objects.all()
+    summaries = UserBalanceSummary.objects.all()
+    if user_ids is not None:
+        balances = balances.filter(user_id__in=user_ids)
+        summaries = summaries.filter(user_id__in=user_ids)
+
+    totals = (
+        balances.order_by()
+        .values("user_id", "group__currency")
+        .annotate(
+            owed=Sum("net_amount", filter=Q(net_amount__gt=0)),
+            owing=Sum("net_amount", filter=Q(net_amount__lt=0)),
+        )
+    )
+    summaries.delete()
+    UserBalanceSummary.objects.bulk_create(
+        UserBalanceSummary(
+            user_id=row["user_id"],
+            currency=row["group__currency"],
+            total_owed=(row["owed"] or ZERO).quantize(Decimal("0.01")),
+            total_owing=(-(row["owing"] or ZERO)).quantize(Decimal("0.01")),
+        )
+        for row in totals
+    )
+
+
+def user_summary(user, top=5):
+    totals = [
+        {
+            "currency": row.currency,
+            "owed_to_you": float(row.total_owed),
+            "you_owe": float(row.total_owing),
+            "net": float(row.total_owed - row.total_owing),
+        }
+        for row in UserBalanceSummary.objects.filter(user=user).order_by("currency")
+    ]
+
+    groups = [
+        {
+            "group_id": row["group_id"],
+            "group_name": row["group__name"],
+            "currency": row["group__currency"],
+            "net_balance": float(row["net_amount"]),
+        }
+        for row in MemberBalance.objects.filter(user=user)
+        .exclude(net_amount=0)
+        .order_by("group_id")
+        .values("group_id", "group__name", "group__currency", "net_amount")
+    ]
+
+    # Positive means the counterparty owes the user.
+    counterparties = {}
+    for row in (
+        PairwiseDebt.objects.filter(creditor=user)
+        .order_by()
+        .values("debtor_id", "debtor__name", "group__currency")
+        .annotate(total=Sum("amount"))
+    ):
+        key = (row["debtor_id"], row["group__currency"])
+        counterparties[key] = [row["debtor__name"], row["total"]]
+    for row in (
+        PairwiseDebt.objects.filter(debtor=user)
+        .order_by()
+        .values("creditor_id", "creditor__name", "group__currency")
+        .annotate(total=Sum("amount"))
+    ):
+        key = (row["creditor_id"], row["group__currency"])
+        entry = counterparties.setdefault(key, [row["creditor__name"], ZERO])
+        entry[1] -= row["total"]
+
+    ranked = sorted(
+        counterparties.items(), key=lambda item: (-abs(item[1][1]), item[0])
+    )
+    top_counterparties = [
+        {
+            "user_id": uid,
+            "name": name,
+            "currency": currency,
+            "net": float(amount.quantize(Decimal("0.01"))),
+        }
+        for (uid, currency), (name, amount) in ranked[:top]
+        if amount
+    ]
+
+    return {
+        "totals": totals,
+        "groups": groups,
+        "top_counterparties": top_counterparties,
+    }
+
+
+def rebuild_pairwise_debts(group, net):
+    PairwiseDebt.objects.filter(group=group).delete()
+    PairwiseDebt.objects.bulk_create(
+        PairwiseDebt(group=group, debtor_id=debtor_id, creditor_id=creditor_id, amount=amount)
+        for (debtor_id, creditor_id), amount in match_debts(net).items()
+    )
+
+
+def _signed_totals(queryset, user_field, amount_field, sign):
+    return (
+        queryset.order_by()
+        .values(uid=F(user_field))
+        .annotate(total=Sum(amount_field), sign=Value(sign))
+    )
+
+
+def aggregate_group_net(group, member_ids=()):
+    # One UNION ALL of four GROUP BY user queries: payments and settlements
+    # sent count for a user, splits and settlements received count against.
+    net = {uid: ZERO for uid in member_ids}
+    rows = _signed_totals(
+        ExpensePayment.objects.filter(expense__group=group), "user", "amount", 1
+    ).union(
+        _signed_totals(
+            ExpenseSplit.objects.filter(expense__group=group), "user", "share_amount", -1
+        ),
+        _signed_totals(Settlement.objects.filter(group=group), "from_user", "amount", 1),
+        _signed_totals(Settlement.objects.filter(group=group), "to_user", "amount", -1),
+        all=True,
+    )
+    for row in rows:
+        net[row["uid"]] = net.get(row["uid"], ZERO) + row["sign"] * row["total"]
+    return {uid: amount.quantize(Decimal("0.01")) for uid, amount in net.items()}
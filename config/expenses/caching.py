@@ -0,0 +1,103 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils.http import parse_etags, quote_etag
+
+from .metrics import registry
+from .models import Group
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        registry.inc("group_cache_requests_total", (("result", "hit" if hit else "miss"),))
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+stats = CacheStats()
+
+
+def _cache():
+    return caches[getattr(settings, "GROUP_CACHE_ALIAS", "default")]
+
+
+def lock_group(group):
+    # Writers lock the group row before any ledger rows, so every write path
+    # takes its locks in the same order. Paths that validate against the
+    # ledger before bumping the revision call this first.
+    Group.objects.select_for_update().filter(pk=group.pk).values_list("pk", flat=True).get()
+
+
+def bump_group_revision(group):
+    # Call inside the transaction that changes the group. Cached responses are
+    # keyed by revision, so older entries are never read again and simply expire.
+    # The new revision is also the change_seq for rows written by that change.
+    Group.objects.filter(pk=group.pk).update(revision=F("revision") + 1)
+    group.revision = Group.objects.values_list("revision", flat=True).get(pk=group.pk)
+    return group.revision
+
+
+def group_cache_key(group, name):
+    return f"group:{group.pk}:r{group.revision}:{name}"
+
+
+def cached_group_data(group, name, build):
+    cache = _cache()
+    key = group_cache_key(group, name)
+    data = cache.get(key)
+    if data is not None:
+        stats.record(hit=True)
+        return data
+
+    stats.record(hit=False)
+    data = build()
+    cache.set(key, data, getattr(settings, "GROUP_CACHE_TIMEOUT", 300))
+    return data
+
+
+async def acached_group_data(group, name, build):
+    # build is a coroutine function; shares entries with cached_group_data.
+    cache = _cache()
+    key = group_cache_key(group, name)
+    data = await cache.aget(key)
+    if data is not None:
+        stats.record(hit=True)
+        return data
+
+    stats.record(hit=False)
+    data = await build()
+    await cache.aset(key, data, getattr(settings, "GROUP_CACHE_TIMEOUT", 300))
+    return data
+
+
+def group_etag(group, name, request):
+    # Strong validator: the group revision changes on every write that can
+    # change these responses, and the query string picks the representation.
+    tag = f"g{group.pk}-r{group.revision}-{name}"
+    query = getattr(request, "query_params", request.GET).urlencode()
+    if query:
+        tag += "-" + hashlib.sha1(query.encode()).hexdigest()[:12]
+    return quote_etag(tag)
+
+
+def etag_matches(request, etag):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return "*" in etags or etag in etags
@@ -0,0 +1,123 @@
+import itertools
+from decimal import Decimal
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from django.conf import settings
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+
+from .models import ExpensePayment, ExpenseSplit, Settlement
+
+
+# Below this many rows building the NumPy arrays costs more than it saves.
+NUMPY_MIN_ROWS = 4096
+
+
+def numpy_enabled():
+    return np is not None and getattr(settings, "BALANCE_ENGINE_NUMPY", False)
+
+
+def to_cents(amount):
+    numerator, denominator = Decimal(amount).as_integer_ratio()
+    if 100 % denominator == 0:
+        return numerator * (100 // denominator)
+    return div_round(numerator * 100, denominator)
+
+
+def cents_of(field):
+    # Converted in SQL so rows arrive as ints. The round guards against
+    # backends such as SQLite that multiply in floating point.
+    return Cast(Round(F(field) * 100), output_field=BigIntegerField())
+
+
+def from_cents(cents):
+    return Decimal(cents).scaleb(-2)
+
+
+def div_round(numerator, denominator):
+    # numerator / denominator rounded half to even, the rounding
+    # Decimal.quantize uses under the default context. denominator > 0.
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+def net_cents(payments, splits, settlements, member_ids=(), use_numpy=None):
+    # payments and splits are [(user_id, cents)], settlements are
+    # [(from_user_id, to_user_id, cents)]. Paying and settling count for a
+    # user, owing a split and receiving a settlement count against.
+    if use_numpy is None:
+        rows = len(payments) + len(splits) + len(settlements)
+        use_numpy = numpy_enabled() and rows >= NUMPY_MIN_ROWS
+
+    if use_numpy:
+        totals = _numpy_totals(payments, splits, settlements)
+    else:
+        totals = {}
+        for uid, cents in payments:
+            totals[uid] = totals.get(uid, 0) + cents
+        for uid, cents in splits:
+            totals[uid] = totals.get(uid, 0) - cents
+        for from_id, to_id, cents in settlements:
+            totals[from_id] = totals.get(from_id, 0) + cents
+            totals[to_id] = totals.get(to_id, 0) - cents
+
+    net = dict.fromkeys(member_ids, 0)
+    for uid, cents in totals.items():
+        net[uid] = net.get(uid, 0) + cents
+    return net
+
+
+def _numpy_totals(payments, splits, settlements):
+    users = []
+    amounts = []
+    for rows, user_column, amount_column, sign in (
+        (payments, 0, 1, 1),
+        (splits, 0, 1, -1),
+        (settlements, 0, 2, 1),
+        (settlements, 1, 2, -1),
+    ):
+        if rows:
+            width = len(rows[0])
+            array = np.fromiter(
+                itertools.chain.from_iterable(rows), dtype=np.int64, count=len(rows) * width
+            ).reshape(-1, width)
+            users.append(array[:, user_column])
+            amounts.append(array[:, amount_column] * sign)
+    if not users:
+        return {}
+
+    keys, index = np.unique(np.concatenate(users), return_inverse=True)
+    totals = np.zeros(len(keys), dtype=np.int64)
+    np.add.at(totals, index, np.concatenate(amounts))
+    return dict(zip(keys.tolist(), totals.tolist()))
+
+
+def load_group_net_cents(group, member_ids=(), use_numpy=None):
+    payments = list(
+        ExpensePayment.objects.filter(expense__group=group).values_list(
+            "user_id", cents_of("amount")
+        )
+    )
+    splits = list(
+        ExpenseSplit.objects.filter(expense__group=group).values_list(
+            "user_id", cents_of("share_amount")
+        )
+    )
+    settlements = list(
+        Settlement.objects.filter(group=group).values_list(
+            "from_user_id", "to_user_id", cents_of("amount")
+        )
+    )
+    return net_cents(payments, splits, settlements, member_ids, use_numpy)
+
+
+def load_group_net(group, member_ids=()):
+    # load_group_net_cents as Decimal amounts, for the stored balance rows.
+    return {uid: from_cents(cents) for uid, cents in load_group_net_cents(group, member_ids).items()}
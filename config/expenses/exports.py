@@ -0,0 +1,84 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Expense, ExpensePayment, ExpenseSplit, Settlement
+
+
+EXPORT_FIELDS = (
+    "type",
+    "id",
+    "expense_id",
+    "user_id",
+    "to_user_id",
+    "amount",
+    "description",
+    "split_type",
+    "note",
+    "timestamp",
+)
+CHUNK_SIZE = 2000
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def iter_ledger_rows(group):
+    # Plain tuples straight off the cursor, one record type after another,
+    # so memory use does not depend on the size of the group's history.
+    expenses = (
+        Expense.objects.filter(group=group)
+        .order_by("id")
+        .values_list("id", "paid_by_id", "amount", "description", "split_type", "created_at")
+    )
+    for pk, user_id, amount, description, split_type, created_at in expenses.iterator(
+        chunk_size=CHUNK_SIZE
+    ):
+        yield ("expense", pk, None, user_id, None, amount, description, split_type, "", created_at)
+
+    payments = (
+        ExpensePayment.objects.filter(expense__group=group)
+        .order_by("id")
+        .values_list("id", "expense_id", "user_id", "amount", "expense__created_at")
+    )
+    for pk, expense_id, user_id, amount, created_at in payments.iterator(chunk_size=CHUNK_SIZE):
+        yield ("payment", pk, expense_id, user_id, None, amount, "", "", "", created_at)
+
+    splits = (
+        ExpenseSplit.objects.filter(expense__group=group)
+        .order_by("id")
+        .values_list("id", "expense_id", "user_id", "share_amount", "expense__created_at")
+    )
+    for pk, expense_id, user_id, amount, created_at in splits.iterator(chunk_size=CHUNK_SIZE):
+        yield ("split", pk, expense_id, user_id, None, amount, "", "", "", created_at)
+
+    settlements = (
+        Settlement.objects.filter(group=group)
+        .order_by("id")
+        .values_list("id", "from_user_id", "to_user_id", "amount", "note", "date")
+    )
+    for pk, from_id, to_id, amount, note, date in settlements.iterator(chunk_size=CHUNK_SIZE):
+        yield ("settlement", pk, None, from_id, to_id, amount, "", "", note, date)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def stream_ledger_csv(group):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in iter_ledger_rows(group):
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def stream_ledger_ndjson(group):
+    for row in iter_ledger_rows(group):
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + "\n"
@@ -0,0 +1,61 @@
+import codecs
+import csv
+import json
+
+
+CSV_CONTENT_TYPES = ("text/csv", "application/csv")
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+def _parse_pairs(cell, value_key):
+    # "12:30.00;15:20.00" -> [{"user": "12", value_key: "30.00"}, ...]
+    pairs = []
+    for part in (cell or "").split(";"):
+        part = part.strip()
+        if not part:
+            continue
+        user, sep, value = part.partition(":")
+        if not sep:
+            raise ValueError(f"Expected user:{value_key} pairs, got '{part}'")
+        pairs.append({"user": user.strip(), value_key: value.strip()})
+    return pairs
+
+
+def iter_csv_rows(stream):
+    # Header: description,amount,split_type[,payments][,splits]
+    reader = csv.DictReader(codecs.iterdecode(stream, "utf-8-sig"))
+    for row in reader:
+        try:
+            yield reader.line_num, {
+                "description": row.get("description"),
+                "amount": row.get("amount"),
+                "split_type": row.get("split_type"),
+                "payments": _parse_pairs(row.get("payments"), "amount"),
+                "splits": _parse_pairs(row.get("splits"), "value"),
+            }
+        except ValueError as e:
+            yield reader.line_num, e
+
+
+def iter_ndjson_rows(stream):
+    for line_num, line in enumerate(codecs.iterdecode(stream, "utf-8-sig"), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_num, ValueError("Invalid JSON")
+            continue
+        if not isinstance(row, dict):
+            yield line_num, ValueError("Each line must be a JSON object")
+            continue
+        yield line_num, row
+
+
+def iter_import_rows(stream, content_type):
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in CSV_CONTENT_TYPES:
+        return iter_csv_rows(stream)
+    if content_type in NDJSON_CONTENT_TYPES:
+        return iter_ndjson_rows(stream)
+    return None
@@ -0,0 +1,201 @@
+from datetime import datetime, time
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .balances import expense_deltas, settlement_deltas
+from .engine import cents_of, to_cents
+from .models import (
+    BalanceSnapshot,
+    Expense,
+    ExpensePayment,
+    ExpenseSplit,
+    LedgerEvent,
+    Settlement,
+)
+
+
+def snapshot_interval():
+    return getattr(settings, "LEDGER_SNAPSHOT_INTERVAL", 500)
+
+
+def _encode(net):
+    return {str(uid): cents for uid, cents in net.items() if cents}
+
+
+def add_deltas(net, deltas):
+    for uid, cents in deltas.items():
+        uid = int(uid)
+        net[uid] = net.get(uid, 0) + cents
+
+
+def expense_event(expense, payments, splits):
+    deltas = expense_deltas(payments, splits)
+    return LedgerEvent(
+        group_id=expense.group_id,
+        kind="expense",
+        expense=expense,
+        deltas=_encode({uid: to_cents(amount) for uid, amount in deltas.items()}),
+        occurred_at=expense.created_at,
+        change_seq=expense.change_seq,
+    )
+
+
+def settlement_event(settlement):
+    deltas = settlement_deltas(settlement)
+    return LedgerEvent(
+        group_id=settlement.group_id,
+        kind="settlement",
+        settlement=settlement,
+        deltas=_encode({uid: to_cents(amount) for uid, amount in deltas.items()}),
+        occurred_at=settlement.date,
+        change_seq=settlement.change_seq,
+    )
+
+
+def append_events(group, events):
+    # Call inside the write transaction, after bump_group_revision: the
+    # revision update serializes writers of the group, so nobody else can
+    # take the next sequence numbers in between.
+    if not events:
+        return
+    last = LedgerEvent.objects.filter(group=group).aggregate(last=Max("seq"))["last"] or 0
+    for offset, event in enumerate(events, 1):
+        event.seq = last + offset
+    LedgerEvent.objects.bulk_create(events)
+
+    interval = snapshot_interval()
+    if interval and (last + len(events)) // interval > last // interval:
+        take_snapshot(group)
+
+
+def latest_snapshot(group, seq=None):
+    snapshots = BalanceSnapshot.objects.filter(group=group)
+    if seq is not None:
+        snapshots = snapshots.filter(seq__lte=seq)
+    return snapshots.order_by("-seq").first()
+
+
+def ledger_net(group, seq=None):
+    # Net cents per user after event `seq` (default: the latest): the closest
+    # snapshot at or before it plus the events since. Returns (seq, net).
+    snapshot = latest_snapshot(group, seq)
+    last, net = 0, {}
+    if snapshot is not None:
+        last = snapshot.seq
+        add_deltas(net, snapshot.nets)
+
+    tail = LedgerEvent.objects.filter(group=group, seq__gt=last)
+    if seq is not None:
+        tail = tail.filter(seq__lte=seq)
+    for event_seq, deltas in tail.order_by("seq").values_list("seq", "deltas"):
+        add_deltas(net, deltas)
+        last = event_seq
+    return last, net
+
+
+def parse_as_of(value):
+    # ISO 8601 datetime, or a bare date meaning the end of that day. Naive
+    # values are read in the current time zone.
+    try:
+        day = parse_date(value)
+        moment = datetime.combine(day, time.max) if day is not None else parse_datetime(value)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValueError("as_of must be an ISO 8601 date or datetime")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def last_seq_at(group, moment):
+    # Writers are serialized per group, so seq order is time order and the
+    # newest event at or before `moment` closes the window.
+    return (
+        LedgerEvent.objects.filter(group=group, occurred_at__lte=moment)
+        .order_by("-occurred_at", "-seq")
+        .values_list("seq", flat=True)
+        .first()
+    )
+
+
+def ledger_net_at(group, moment):
+    seq = last_seq_at(group, moment)
+    if seq is None:
+        return 0, {}
+    return ledger_net(group, seq)
+
+
+def take_snapshot(group):
+    seq, net = ledger_net(group)
+    if not seq:
+        return None
+    occurred_at = LedgerEvent.objects.values_list("occurred_at", flat=True).get(
+        group=group, seq=seq
+    )
+    snapshot, _ = BalanceSnapshot.objects.get_or_create(
+        group=group, seq=seq, defaults={"nets": _encode(net), "occurred_at": occurred_at}
+    )
+    return snapshot
+
+
+def rebuild_group_ledger(group):
+    # Replays history into a fresh event ledger, in the order it was written.
+    # Only for backfills and repairs; normal writes append through append_events.
+    LedgerEvent.objects.filter(group=group).delete()
+    BalanceSnapshot.objects.filter(group=group).delete()
+
+    payments = ExpensePayment.objects.filter(expense__group=group).values_list(
+        "expense_id", "user_id", cents_of("amount")
+    )
+    splits = ExpenseSplit.objects.filter(expense__group=group).values_list(
+        "expense_id", "user_id", cents_of("share_amount")
+    )
+    deltas = {}
+    for rows, sign in ((payments, 1), (splits, -1)):
+        for expense_id, uid, cents in rows.iterator(chunk_size=2000):
+            entry = deltas.setdefault(expense_id, {})
+            entry[uid] = entry.get(uid, 0) + sign * cents
+
+    history = []
+    for expense_id, change_seq, created_at in Expense.objects.filter(group=group).values_list(
+        "id", "change_seq", "created_at"
+    ):
+        entry = _encode(deltas.get(expense_id, {}))
+        history.append((change_seq, created_at, 0, expense_id, "expense", entry))
+    for settlement_id, change_seq, date, from_id, to_id, cents in Settlement.objects.filter(
+        group=group
+    ).values_list("id", "change_seq", "date", "from_user_id", "to_user_id", cents_of("amount")):
+        entry = _encode({from_id: cents, to_id: -cents})
+        history.append((change_seq, date, 1, settlement_id, "settlement", entry))
+    # Write order: by change sequence, then time, expenses before settlements.
+    history.sort(key=lambda row: row[:4])
+
+    interval = snapshot_interval()
+    events = []
+    snapshots = []
+    net = {}
+    for seq, (change_seq, occurred_at, _, source_id, kind, event_deltas) in enumerate(history, 1):
+        events.append(
+            LedgerEvent(
+                group=group,
+                seq=seq,
+                kind=kind,
+                expense_id=source_id if kind == "expense" else None,
+                settlement_id=source_id if kind == "settlement" else None,
+                deltas=event_deltas,
+                occurred_at=occurred_at,
+                change_seq=change_seq,
+            )
+        )
+        add_deltas(net, event_deltas)
+        if interval and seq % interval == 0:
+            snapshots.append(
+                BalanceSnapshot(group=group, seq=seq, nets=_encode(net), occurred_at=occurred_at)
+            )
+    LedgerEvent.objects.bulk_create(events, batch_size=2000)
+    BalanceSnapshot.objects.bulk_create(snapshots)
+    return len(events)
@@ -0,0 +1,145 @@
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from expenses.balances import aggregate_group_net
+from expenses.models import (
+    User,
+    Group,
+    GroupMember,
+    Expense,
+    ExpenseSplit,
+    ExpensePayment,
+    Settlement,
+)
+
+
+MEMBERS = 10
+
+
+def legacy_group_net(group):
+    # The row-by-row implementation aggregate_group_net replaced, kept here
+    # as the baseline the benchmark compares against.
+    members = GroupMember.objects.filter(group=group).select_related("user")
+    net = {member.user_id: Decimal("0.00") for member in members}
+    for payment in ExpensePayment.objects.filter(expense__group=group).select_related("user"):
+        net[payment.user_id] = net.get(payment.user_id, Decimal("0.00")) + payment.amount
+    for split in ExpenseSplit.objects.filter(expense__group=group).select_related("user"):
+        net[split.user_id] = net.get(split.user_id, Decimal("0.00")) - split.share_amount
+    for settlement in Settlement.objects.filter(group=group):
+        net[settlement.from_user_id] = (
+            net.get(settlement.from_user_id, Decimal("0.00")) + settlement.amount
+        )
+        net[settlement.to_user_id] = (
+            net.get(settlement.to_user_id, Decimal("0.00")) - settlement.amount
+        )
+    return net
+
+
+def aggregated_group_net(group):
+    member_ids = GroupMember.objects.filter(group=group).values_list("user_id", flat=True)
+    return aggregate_group_net(group, list(member_ids))
+
+
+class Command(BaseCommand):
+    help = "Compare SQL balance aggregation against the row-by-row Python loop"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[1000, 10000, 100000],
+            help="Payment + split rows per seeded group",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'rows':>8} {'impl':<10} {'queries':>7} {'ms':>9} {'peak KiB':>10}"
+        )
+        for rows in options["rows"]:
+            # Everything seeded for a run is rolled back afterwards.
+            with transaction.atomic():
+                group = self._seed(rows)
+                results = []
+                for name, func in (
+                    ("python", legacy_group_net),
+                    ("sql", aggregated_group_net),
+                ):
+                    queries, elapsed, peak, net = self._measure(func, group)
+                    results.append(
+                        {uid: amount.quantize(Decimal("0.01")) for uid, amount in net.items()}
+                    )
+                    self.stdout.write(
+                        f"{rows:>8} {name:<10} {queries:>7} {elapsed * 1000:>9.1f} {peak / 1024:>10.1f}"
+                    )
+                if results[0] != results[1]:
+                    self.stderr.write(self.style.ERROR(f"Balances differ at {rows} rows"))
+                transaction.set_rollback(True)
+
+    def _measure(self, func, group):
+        tracemalloc.start()
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            net = func(group)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return len(ctx.captured_queries), elapsed, peak, net
+
+    def _seed(self, rows):
+        users = [
+            User.objects.create_user(
+                email=f"bench-{rows}-{i}@example.com",
+                username=f"bench-{rows}-{i}",
+                name=f"Bench {i}",
+                password=None,
+            )
+            for i in range(MEMBERS)
+        ]
+        group = Group.objects.create(name=f"bench {rows}", created_by=users[0])
+        GroupMember.objects.bulk_create(GroupMember(group=group, user=u) for u in users)
+
+        # Each equal-split expense writes one payment and one split per member.
+        expense_count = max(rows // (MEMBERS + 1), 1)
+        amount = Decimal("100.00")
+        share = (amount / MEMBERS).quantize(Decimal("0.01"))
+        expenses = Expense.objects.bulk_create(
+            Expense(
+                group=group,
+                paid_by=users[i % MEMBERS],
+                amount=amount,
+                description=f"bench {i}",
+                split_type="equal",
+            )
+            for i in range(expense_count)
+        )
+        ExpensePayment.objects.bulk_create(
+            (
+                ExpensePayment(expense=e, user_id=e.paid_by_id, amount=amount)
+                for e in expenses
+            ),
+            batch_size=5000,
+        )
+        ExpenseSplit.objects.bulk_create(
+            (
+                ExpenseSplit(expense=e, user=u, share_amount=share)
+                for e in expenses
+                for u in users
+            ),
+            batch_size=5000,
+        )
+        Settlement.objects.bulk_create(
+            Settlement(
+                group=group,
+                from_user=users[(i + 1) % MEMBERS],
+                to_user=users[i % MEMBERS],
+                amount=Decimal("1.00"),
+            )
+            for i in range(max(expense_count // 10, 1))
+        )
+        return group
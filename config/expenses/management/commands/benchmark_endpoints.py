@@ -0,0 +1,251 @@
+import copy
+import json
+import logging
+import math
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from expenses.membership import member_cache
+from expenses.models import Expense, Group, GroupMember
+
+
+def percentile(samples, p):
+    # Nearest-rank percentile of a non-empty list.
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def expense_payloads(group, member_ids):
+    first, second = member_ids[0], member_ids[1]
+    yield {"group": group.id, "amount": "120.00", "description": "bench", "split_type": "equal"}
+    yield {
+        "group": group.id,
+        "amount": "90.00",
+        "description": "bench",
+        "split_type": "custom",
+        "splits": [{"user": first, "value": "30"}, {"user": second, "value": "60"}],
+    }
+    yield {
+        "group": group.id,
+        "amount": "50.00",
+        "description": "bench",
+        "split_type": "percentage",
+        "splits": [{"user": first, "value": "50"}, {"user": second, "value": "50"}],
+        "payments": [{"user": first, "amount": "20"}, {"user": second, "amount": "30"}],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure p50/p95 latency and query counts of the group endpoints through "
+        "the test client and write the results as JSON"
+    )
+
+    endpoints = {
+        "balances": ("get", "/api/groups/{id}/balances/"),
+        "detail": ("get", "/api/groups/{id}/detail/"),
+        "expenses": ("get", "/api/groups/{id}/expenses/"),
+        "expenses_page": ("get", "/api/groups/{id}/expenses/?page_size=50"),
+        "snapshot": ("get", "/api/groups/{id}/snapshot/"),
+        "add_expense": ("post", "/api/expenses/"),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--group",
+            type=int,
+            action="append",
+            dest="groups",
+            help="Group id to benchmark (can be repeated); defaults to groups named --prefix-*",
+        )
+        parser.add_argument("--prefix", default="seed")
+        parser.add_argument(
+            "--endpoint", action="append", dest="only", choices=sorted(self.endpoints)
+        )
+        parser.add_argument("--runs", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument(
+            "--warm",
+            action="store_true",
+            help="Keep the group response cache between requests instead of clearing it",
+        )
+        parser.add_argument("--label", default="", help="Stored in the output, e.g. a commit id")
+        parser.add_argument("--output", help="Write JSON here instead of stdout")
+        parser.add_argument("--compare", help="Earlier JSON output to print changes against")
+
+    def handle(self, *args, **options):
+        groups = Group.objects.order_by("id")
+        if options["groups"]:
+            groups = groups.filter(id__in=options["groups"])
+        else:
+            groups = groups.filter(name__startswith=f"{options['prefix']}-")
+        groups = list(groups)
+        if not groups:
+            raise CommandError("No groups to benchmark; run seed_workload first or pass --group")
+
+        names = options["only"] or list(self.endpoints)
+        writes = [name for name in names if self.endpoints[name][0] != "get"]
+        if writes and connection.vendor != "sqlite":
+            raise CommandError(
+                f"{', '.join(writes)} only runs against a SQLite default database; "
+                "benchmark the read endpoints with --endpoint"
+            )
+        group_sizes = [
+            {
+                "id": group.id,
+                "members": GroupMember.objects.filter(group=group).count(),
+                "expenses": Expense.objects.filter(group=group).count(),
+            }
+            for group in groups
+        ]
+
+        # Responses are cached in a private alias, and writes go to a copy of
+        # the database that is thrown away afterwards, so the run leaves no
+        # trace in the shared cache or database. Each write still commits on
+        # its own, as it would behind a server.
+        bench_caches = dict(settings.CACHES)
+        bench_caches["benchmark"] = {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "expenses-benchmark",
+        }
+        db_settings = connections.settings[DEFAULT_DB_ALIAS]
+        saved = copy.deepcopy(db_settings)
+        workdir = Path(tempfile.mkdtemp(prefix="benchmark-endpoints-")) if writes else None
+        query_log = logging.getLogger("expenses.queries")
+        log_level = query_log.level
+        query_log.setLevel(logging.ERROR)
+        try:
+            if workdir is not None:
+                self._use_copy(db_settings, workdir / "db.sqlite3")
+            with override_settings(CACHES=bench_caches, GROUP_CACHE_ALIAS="benchmark"):
+                member_cache.clear()
+                try:
+                    samples = {name: [] for name in names}
+                    for group in groups:
+                        for name in names:
+                            samples[name].extend(self._run(group, name, options))
+                finally:
+                    caches["benchmark"].clear()
+        finally:
+            if workdir is not None:
+                connections.close_all()
+                db_settings.clear()
+                db_settings.update(saved)
+                shutil.rmtree(workdir, ignore_errors=True)
+            query_log.setLevel(log_level)
+            member_cache.clear()
+
+        result = {
+            "label": options["label"],
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "runs": options["runs"],
+            "warm_cache": options["warm"],
+            "groups": group_sizes,
+            "endpoints": {name: self._summarize(rows) for name, rows in samples.items()},
+        }
+
+        text = json.dumps(result, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(text + "\n")
+        else:
+            self.stdout.write(text)
+
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                self._compare(json.load(f), result)
+
+    def _use_copy(self, db_settings, path):
+        # Points the default connection at a consistent copy of the current
+        # database, with the same options, the way stress_sqlite points it at a
+        # fresh one.
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+        connections.close_all()
+        db_settings["NAME"] = str(path)
+
+    def _run(self, group, name, options):
+        method, url = self.endpoints[name]
+        url = url.format(id=group.id)
+        member_ids = list(
+            GroupMember.objects.filter(group=group).order_by("id").values_list("user_id", flat=True)
+        )
+        client = Client()
+        token = AccessToken.for_user(group.created_by)
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        payloads = expense_payloads(group, member_ids)
+        bench_cache = caches["benchmark"]
+
+        rows = []
+        for run in range(options["warmup"] + options["runs"]):
+            if not options["warm"]:
+                bench_cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                if method == "get":
+                    response = client.get(url, **headers)
+                else:
+                    payload = next(payloads, None)
+                    if payload is None:
+                        payloads = expense_payloads(group, member_ids)
+                        payload = next(payloads)
+                    response = client.post(
+                        url, json.dumps(payload), content_type="application/json", **headers
+                    )
+                elapsed = time.perf_counter() - start
+            if response.status_code >= 400:
+                raise CommandError(
+                    f"{name} on group {group.id} returned {response.status_code}: "
+                    f"{response.content[:200]!r}"
+                )
+            if run >= options["warmup"]:
+                rows.append((elapsed * 1000, len(queries), response.status_code))
+        return rows
+
+    def _summarize(self, rows):
+        latencies = [ms for ms, _, _ in rows]
+        queries = [count for _, count, _ in rows]
+        statuses = {}
+        for _, _, code in rows:
+            statuses[str(code)] = statuses.get(str(code), 0) + 1
+        return {
+            "samples": len(rows),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "mean_ms": round(sum(latencies) / len(latencies), 3),
+            "max_ms": round(max(latencies), 3),
+            "queries_p50": percentile(queries, 50),
+            "queries_max": max(queries),
+            "statuses": statuses,
+        }
+
+    def _compare(self, before, after):
+        self.stderr.write(
+            f"{'endpoint':<14} {'p50 ms':>17} {'p95 ms':>17} {'queries':>9}"
+        )
+        for name, now in after["endpoints"].items():
+            then = before.get("endpoints", {}).get(name)
+            if then is None:
+                continue
+            self.stderr.write(
+                f"{name:<14} "
+                f"{then['p50_ms']:>7.2f} -> {now['p50_ms']:>6.2f} "
+                f"{then['p95_ms']:>7.2f} -> {now['p95_ms']:>6.2f} "
+                f"{then['queries_p50']:>3} -> {now['queries_p50']:>3}"
+            )
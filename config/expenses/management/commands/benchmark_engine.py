@@ -0,0 +1,139 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses import engine
+from expenses.models import Group, GroupMember
+from expenses.views import GroupBalancesView
+
+
+def decimal_net(payments, splits, settlements):
+    # The Decimal arithmetic the balance code used before the cents engine.
+    net = {}
+    for uid, amount in payments:
+        net[uid] = net.get(uid, Decimal("0.00")) + amount
+    for uid, amount in splits:
+        net[uid] = net.get(uid, Decimal("0.00")) - amount
+    for from_id, to_id, amount in settlements:
+        net[from_id] = net.get(from_id, Decimal("0.00")) + amount
+        net[to_id] = net.get(to_id, Decimal("0.00")) - amount
+    return {uid: amount.quantize(Decimal("0.01")) for uid, amount in net.items()}
+
+
+def partition(total, parts, rng):
+    cuts = sorted(rng.randint(0, total) for _ in range(parts - 1))
+    bounds = [0] + cuts + [total]
+    return [bounds[i + 1] - bounds[i] for i in range(parts)]
+
+
+def random_ledger(rows, users, rng):
+    expenses = []
+    split_rows = 0
+    while split_rows < rows:
+        amount = rng.randint(100, 500000)
+        payers = rng.sample(range(1, users + 1), rng.randint(1, min(3, users)))
+        sharers = rng.sample(range(1, users + 1), rng.randint(2, min(6, users)))
+        payments = [
+            (uid, Decimal(cents) / 100)
+            for uid, cents in zip(payers, partition(amount, len(payers), rng))
+            if cents
+        ]
+        if not payments:
+            continue
+        splits = [
+            (uid, Decimal(cents) / 100)
+            for uid, cents in zip(sharers, partition(amount, len(sharers), rng))
+        ]
+        expenses.append((payments, splits))
+        split_rows += len(splits)
+
+    settlements = []
+    for _ in range(rows // 20):
+        from_id, to_id = rng.sample(range(1, users + 1), 2)
+        settlements.append((from_id, to_id, Decimal(rng.randint(1, 100000)) / 100))
+    return expenses, settlements
+
+
+class Command(BaseCommand):
+    help = "Check the integer-cents balance engine against Decimal arithmetic and time both"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000, help="Split rows to generate")
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--group",
+            type=int,
+            action="append",
+            dest="groups",
+            help="Also check the engine against the stored ledger of this group id (can be repeated)",
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        expenses, settlements = random_ledger(options["rows"], options["users"], rng)
+        payments = [row for expense_payments, _ in expenses for row in expense_payments]
+        splits = [row for _, expense_splits in expenses for row in expense_splits]
+        self.stdout.write(
+            f"{len(payments)} payments, {len(splits)} splits, {len(settlements)} settlements"
+        )
+
+        start = time.perf_counter()
+        expected = decimal_net(payments, splits, settlements)
+        self._report("net", "decimal", time.perf_counter() - start)
+
+        paths = [("int", False)]
+        if engine.np is not None:
+            paths.append(("numpy", True))
+        else:
+            self.stdout.write("numpy is not installed; only the pure-int path is checked")
+
+        # The stored-ledger path gets cents straight from SQL (engine.cents_of);
+        # converting here is timed separately so the paths compare like for like.
+        start = time.perf_counter()
+        payment_cents = [(uid, engine.to_cents(amount)) for uid, amount in payments]
+        split_cents = [(uid, engine.to_cents(amount)) for uid, amount in splits]
+        settlement_cents = [(f, t, engine.to_cents(amount)) for f, t, amount in settlements]
+        self._report("cents", "convert", time.perf_counter() - start)
+
+        for name, use_numpy in paths:
+            start = time.perf_counter()
+            net = engine.net_cents(
+                payment_cents, split_cents, settlement_cents, use_numpy=use_numpy
+            )
+            self._report("net", name, time.perf_counter() - start)
+            self._compare(f"net ({name})", expected, net)
+
+        for group_id in options["groups"] or ():
+            self._check_group(group_id, paths)
+
+    def _check_group(self, group_id, paths):
+        try:
+            group = Group.objects.get(pk=group_id)
+        except Group.DoesNotExist:
+            raise CommandError(f"Group {group_id} does not exist")
+        members = GroupMember.objects.filter(group=group).select_related("user")
+        expected, _ = GroupBalancesView()._compute_group_net(group, members)
+        member_ids = [member.user_id for member in members]
+        for name, use_numpy in paths:
+            net = engine.load_group_net_cents(group, member_ids, use_numpy=use_numpy)
+            self._compare(f"group {group_id} ({name})", expected, net)
+
+    def _report(self, what, path, elapsed):
+        self.stdout.write(f"{what:<6} {path:<8} {elapsed * 1000:>10.1f} ms")
+
+    def _compare(self, label, expected, cents):
+        expected_cents = {
+            key: engine.to_cents(amount) for key, amount in expected.items() if amount
+        }
+        actual = {key: value for key, value in cents.items() if value}
+        if expected_cents != actual:
+            mismatched = sorted(
+                key
+                for key in set(expected_cents) | set(actual)
+                if expected_cents.get(key) != actual.get(key)
+            )
+            raise CommandError(f"{label}: {len(mismatched)} mismatches, e.g. {mismatched[:5]}")
+        self.stdout.write(self.style.SUCCESS(f"{label}: exact match on {len(actual)} entries"))
@@ -0,0 +1,96 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from expenses.solvers import exact_settlements, greedy_settlements
+
+
+def two_pointer_settlements(net):
+    # The original pairing in dict order, kept as the baseline.
+    creditors = []
+    debtors = []
+    for user_id, balance in net.items():
+        rounded = balance.quantize(Decimal("0.01"))
+        if rounded > 0:
+            creditors.append([user_id, rounded])
+        elif rounded < 0:
+            debtors.append([user_id, -rounded])
+
+    i = 0
+    j = 0
+    optimized = []
+    while i < len(debtors) and j < len(creditors):
+        amount = min(debtors[i][1], creditors[j][1])
+        optimized.append({"from_user": debtors[i][0], "to_user": creditors[j][0], "amount": float(amount)})
+        debtors[i][1] -= amount
+        creditors[j][1] -= amount
+        if debtors[i][1] == 0:
+            i += 1
+        if creditors[j][1] == 0:
+            j += 1
+    return optimized
+
+
+def random_net(members, rng):
+    # Balances built from small sub-groups that each sum to zero, the way
+    # trips with a few separate cars or rooms look in practice.
+    net = {}
+    uid = 1
+    while uid <= members:
+        size = min(rng.randint(2, 4), members - uid + 1)
+        if size < 2:
+            net[uid] = Decimal("0.00")
+            break
+        amounts = [Decimal(rng.randint(1, 50000)) / 100 for _ in range(size - 1)]
+        amounts.append(-sum(amounts))
+        rng.shuffle(amounts)
+        for amount in amounts:
+            net[uid] = amount
+            uid += 1
+    keys = list(net)
+    rng.shuffle(keys)
+    return {key: net[key] for key in keys}
+
+
+class Command(BaseCommand):
+    help = "Compare transfer counts and runtime of the settlement solvers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--members", type=int, nargs="+", default=[10, 100, 1000])
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        solvers = (
+            ("two-pointer", two_pointer_settlements),
+            ("greedy", greedy_settlements),
+            ("exact", exact_settlements),
+        )
+        self.stdout.write(f"{'members':>8} {'solver':<12} {'transfers':>10} {'ms':>9}")
+        for members in options["members"]:
+            cases = [random_net(members, rng) for _ in range(options["runs"])]
+            for name, solver in solvers:
+                transfers = 0
+                elapsed = 0.0
+                for net in cases:
+                    start = time.perf_counter()
+                    plan = solver(net)
+                    elapsed += time.perf_counter() - start
+                    transfers += len(plan)
+                    self._check(net, plan, name)
+                runs = len(cases)
+                self.stdout.write(
+                    f"{members:>8} {name:<12} {transfers / runs:>10.1f} {elapsed * 1000 / runs:>9.2f}"
+                )
+
+    def _check(self, net, plan, name):
+        remaining = {uid: int(balance * 100) for uid, balance in net.items()}
+        for transfer in plan:
+            cents = round(transfer["amount"] * 100)
+            remaining[transfer["from_user"]] += cents
+            remaining[transfer["to_user"]] -= cents
+        if any(remaining.values()):
+            self.stderr.write(self.style.ERROR(f"{name} left balances unsettled"))
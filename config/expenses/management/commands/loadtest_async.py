@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from expenses.membership import member_cache
+from expenses.models import Group
+
+from .benchmark_endpoints import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent-client throughput of the async (ASGI) group read "
+        "endpoints against their sync (WSGI) counterparts"
+    )
+
+    endpoints = {
+        "detail": "groups/{id}/detail/",
+        "expenses": "groups/{id}/expenses/",
+        "balances": "groups/{id}/balances/",
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--group",
+            type=int,
+            action="append",
+            dest="groups",
+            help="Group id to request (can be repeated); defaults to groups named --prefix-*",
+        )
+        parser.add_argument("--prefix", default="seed")
+        parser.add_argument(
+            "--endpoint", action="append", dest="only", choices=sorted(self.endpoints)
+        )
+        parser.add_argument("--concurrency", type=int, default=16, help="Simultaneous clients")
+        parser.add_argument("--requests", type=int, default=400, help="Requests per mode")
+        parser.add_argument(
+            "--cached",
+            action="store_true",
+            help="Serve from the group response cache instead of hitting the database every time",
+        )
+
+    def handle(self, *args, **options):
+        groups = Group.objects.order_by("id")
+        if options["groups"]:
+            groups = groups.filter(id__in=options["groups"])
+        else:
+            groups = groups.filter(name__startswith=f"{options['prefix']}-")
+        groups = list(groups.select_related("created_by"))
+        if not groups:
+            raise CommandError("No groups to request; run seed_workload first or pass --group")
+        concurrency = max(options["concurrency"], 1)
+
+        # Every client acts as the group creator, cycling through the chosen
+        # endpoints of every group.
+        names = options["only"] or list(self.endpoints)
+        targets = []
+        for group in groups:
+            auth = f"Bearer {AccessToken.for_user(group.created_by)}"
+            targets.extend((self.endpoints[name].format(id=group.id), auth) for name in names)
+        plan = [targets[i % len(targets)] for i in range(options["requests"])]
+
+        load_caches = dict(settings.CACHES)
+        load_caches["loadtest"] = {
+            "BACKEND": (
+                "django.core.cache.backends.locmem.LocMemCache"
+                if options["cached"]
+                else "django.core.cache.backends.dummy.DummyCache"
+            ),
+            "LOCATION": "expenses-loadtest",
+        }
+        query_log = logging.getLogger("expenses.queries")
+        log_level = query_log.level
+        query_log.setLevel(logging.ERROR)
+        results = {}
+        with override_settings(CACHES=load_caches, GROUP_CACHE_ALIAS="loadtest"):
+            try:
+                # One pass each first so neither side pays for cold imports,
+                # the member cache or the first database connection.
+                self._wsgi(targets, 1)
+                asyncio.run(self._asgi(targets, 1))
+                results["wsgi"] = self._wsgi(plan, concurrency)
+                results["asgi"] = asyncio.run(self._asgi(plan, concurrency))
+            finally:
+                query_log.setLevel(log_level)
+                member_cache.clear()
+                caches["loadtest"].clear()
+
+        self.stdout.write(
+            f"{len(plan)} requests, {concurrency} concurrent clients, "
+            f"{'cached' if options['cached'] else 'uncached'} responses"
+        )
+        self.stdout.write(f"{'mode':<6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        for mode, (rows, wall) in results.items():
+            latencies = [ms for ms, _ in rows]
+            self.stdout.write(
+                f"{mode:<6} {len(rows) / wall:>9.1f} "
+                f"{percentile(latencies, 50):>9.2f} "
+                f"{percentile(latencies, 95):>9.2f} "
+                f"{max(latencies):>9.2f}"
+            )
+
+    def _check(self, url, response):
+        if response.status_code >= 400:
+            raise CommandError(
+                f"{url} returned {response.status_code}: {response.content[:200]!r}"
+            )
+
+    def _wsgi(self, plan, concurrency):
+        # A thread per client, as a threaded WSGI server would give each
+        # request a worker.
+        def client_loop(chunk):
+            client = Client()
+            rows = []
+            try:
+                for path, auth in chunk:
+                    url = f"/api/{path}"
+                    start = time.perf_counter()
+                    response = client.get(url, HTTP_AUTHORIZATION=auth)
+                    rows.append(((time.perf_counter() - start) * 1000, response.status_code))
+                    self._check(url, response)
+            finally:
+                connections.close_all()
+            return rows
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            start = time.perf_counter()
+            chunks = list(pool.map(client_loop, (plan[i::concurrency] for i in range(concurrency))))
+            wall = time.perf_counter() - start
+        return [row for rows in chunks for row in rows], wall
+
+    async def _asgi(self, plan, concurrency):
+        # A task per client on one event loop.
+        async def client_loop(chunk):
+            client = AsyncClient()
+            rows = []
+            for path, auth in chunk:
+                url = f"/api/async/{path}"
+                start = time.perf_counter()
+                response = await client.get(url, headers={"Authorization": auth})
+                rows.append(((time.perf_counter() - start) * 1000, response.status_code))
+                self._check(url, response)
+            return rows
+
+        start = time.perf_counter()
+        chunks = await asyncio.gather(
+            *(client_loop(plan[i::concurrency]) for i in range(concurrency))
+        )
+        wall = time.perf_counter() - start
+        await sync_to_async(connections.close_all)()
+        return [row for rows in chunks for row in rows], wall
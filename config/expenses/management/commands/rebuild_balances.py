@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from expenses.balances import (
+    rebuild_member_balances,
+    rebuild_pairwise_debts,
+    rebuild_user_summaries,
+)
+from expenses.engine import load_group_net
+from expenses.ledger import rebuild_group_ledger
+from expenses.models import Group, GroupMember
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the balance, pairwise debt and event ledgers from expenses and settlements"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--group",
+            type=int,
+            action="append",
+            dest="groups",
+            help="Only rebuild the given group id (can be repeated)",
+        )
+
+    def handle(self, *args, **options):
+        groups = Group.objects.all().order_by("id")
+        if options["groups"]:
+            groups = groups.filter(id__in=options["groups"])
+
+        count = 0
+        for group in groups.iterator():
+            with transaction.atomic():
+                member_ids = GroupMember.objects.filter(group=group).values_list(
+                    "user_id", flat=True
+                )
+                net = load_group_net(group, member_ids)
+                rebuild_member_balances(group, net)
+                rebuild_pairwise_debts(group, net)
+                rebuild_group_ledger(group)
+            count += 1
+
+        if options["groups"]:
+            user_ids = GroupMember.objects.filter(group_id__in=options["groups"]).values_list(
+                "user_id", flat=True
+            )
+            rebuild_user_summaries(set(user_ids))
+        else:
+            rebuild_user_summaries()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt balances for {count} group(s)"))
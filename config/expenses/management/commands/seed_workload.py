@@ -0,0 +1,173 @@
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from expenses.balances import (
+    rebuild_member_balances,
+    rebuild_pairwise_debts,
+    rebuild_user_summaries,
+)
+from expenses.engine import load_group_net
+from expenses.ledger import rebuild_group_ledger
+from expenses.models import (
+    User,
+    Group,
+    GroupMember,
+    Expense,
+    ExpenseSplit,
+    ExpensePayment,
+    Settlement,
+)
+
+
+SEED_PASSWORD = "seed-Password-1"
+
+
+def partition(total, parts, rng):
+    # total cents cut into `parts` positive pieces (total >= parts).
+    cuts = sorted(rng.sample(range(1, total), parts - 1))
+    bounds = [0] + cuts + [total]
+    return [bounds[i + 1] - bounds[i] for i in range(parts)]
+
+
+def cents(value):
+    return Decimal(value) / 100
+
+
+class Command(BaseCommand):
+    help = "Seed groups, members, expenses and settlements for benchmarking"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", type=int, default=5)
+        parser.add_argument("--members", type=int, default=8)
+        parser.add_argument("--expenses", type=int, default=1000, help="Expenses per group")
+        parser.add_argument("--settlements", type=int, default=50, help="Settlements per group")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Prefix for seeded group names and user emails",
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        prefix = options["prefix"]
+        members = max(options["members"], 2)
+
+        # Hashing is deliberately slow; do it once and share the hash.
+        self.password_hash = make_password(SEED_PASSWORD)
+        user_ids = set()
+        group_ids = []
+        for index in range(options["groups"]):
+            with transaction.atomic():
+                group, users = self._seed_group(f"{prefix}-{index}", members, rng, options)
+                net = load_group_net(group, [user.id for user in users])
+                rebuild_member_balances(group, net)
+                rebuild_pairwise_debts(group, net)
+                rebuild_group_ledger(group)
+            user_ids.update(user.id for user in users)
+            group_ids.append(group.id)
+
+        rebuild_user_summaries(user_ids)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {len(group_ids)} group(s): {', '.join(map(str, group_ids))}. "
+                f"Users log in with password {SEED_PASSWORD!r}."
+            )
+        )
+
+    def _seed_group(self, name, members, rng, options):
+        users = []
+        for i in range(members):
+            email = f"{name}-{i}@example.com"
+            user = User.objects.filter(email=email).first()
+            if user is None:
+                user = User.objects.create(
+                    email=email, username=email, name=f"{name} {i}", password=self.password_hash
+                )
+            users.append(user)
+
+        # Everything below is stamped with a single change sequence.
+        group = Group.objects.create(name=name, created_by=users[0], revision=1)
+        GroupMember.objects.bulk_create(
+            GroupMember(group=group, user=user, change_seq=1) for user in users
+        )
+
+        rows = [self._expense_rows(users, rng) for _ in range(options["expenses"])]
+        expenses = Expense.objects.bulk_create(
+            (
+                Expense(
+                    group=group,
+                    paid_by_id=payments[0][0],
+                    amount=cents(amount),
+                    description=f"{name} expense {i}",
+                    split_type=split_type,
+                    change_seq=1,
+                )
+                for i, (amount, split_type, payments, _) in enumerate(rows)
+            ),
+            batch_size=2000,
+        )
+        ExpensePayment.objects.bulk_create(
+            (
+                ExpensePayment(expense=expense, user_id=uid, amount=cents(value), change_seq=1)
+                for expense, (_, _, payments, _) in zip(expenses, rows)
+                for uid, value in payments
+            ),
+            batch_size=5000,
+        )
+        ExpenseSplit.objects.bulk_create(
+            (
+                ExpenseSplit(expense=expense, user_id=uid, share_amount=share, change_seq=1)
+                for expense, (_, _, _, splits) in zip(expenses, rows)
+                for uid, share in splits
+            ),
+            batch_size=5000,
+        )
+        Settlement.objects.bulk_create(
+            (
+                Settlement(
+                    group=group,
+                    from_user=pair[0],
+                    to_user=pair[1],
+                    amount=cents(rng.randint(100, 5000)),
+                    change_seq=1,
+                )
+                for pair in (rng.sample(users, 2) for _ in range(options["settlements"]))
+            ),
+            batch_size=2000,
+        )
+        return group, users
+
+    def _expense_rows(self, users, rng):
+        amount = rng.randint(500, 500000)
+        payers = rng.sample(users, min(rng.choice((1, 1, 1, 2, 3)), len(users)))
+        payments = [
+            (user.id, value)
+            for user, value in zip(payers, partition(amount, len(payers), rng))
+        ]
+
+        split_type = rng.choice(("equal", "custom", "percentage"))
+        if split_type == "equal":
+            # Same rounding as AddExpenseView: the first members take the leftover cents.
+            share, extra = divmod(amount, len(users))
+            splits = [
+                (user.id, cents(share + 1 if index < extra else share))
+                for index, user in enumerate(users)
+            ]
+        else:
+            sharers = rng.sample(users, rng.randint(2, min(len(users), 20)))
+            if split_type == "custom":
+                values = [cents(value) for value in partition(amount, len(sharers), rng)]
+            else:
+                values = [
+                    (Decimal(percent) / 100 * cents(amount)).quantize(Decimal("0.01"))
+                    for percent in partition(100, len(sharers), rng)
+                ]
+                largest = values.index(max(values))
+                values[largest] += cents(amount) - sum(values)
+            splits = [(user.id, value) for user, value in zip(sharers, values)]
+        return amount, split_type, payments, splits
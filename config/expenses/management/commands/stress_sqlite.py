@@ -0,0 +1,241 @@
+import copy
+import importlib
+import io
+import json
+import logging
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, close_old_connections, connections
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from expenses.membership import member_cache
+from expenses.models import Group, GroupMember
+
+from .benchmark_endpoints import percentile
+
+
+def is_lock_error(exc):
+    return "locked" in str(exc) or "busy" in str(exc)
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer the expense and settlement endpoints from concurrent clients under "
+        "each SQLite settings profile and report throughput and lock errors"
+    )
+
+    profiles = {
+        "default": "config.settings",
+        "production": "config.settings_production",
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profile", action="append", dest="only", choices=sorted(self.profiles)
+        )
+        parser.add_argument("--writers", type=int, default=8, help="Concurrent writing clients")
+        parser.add_argument("--readers", type=int, default=2, help="Clients polling balances meanwhile")
+        parser.add_argument("--requests", type=int, default=50, help="Writes per writing client")
+        parser.add_argument("--members", type=int, default=8)
+
+    def handle(self, *args, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != "sqlite":
+            raise CommandError("stress_sqlite only runs against a SQLite default database")
+
+        # Each profile gets a fresh database file, pointed to the same way the
+        # test runner points connections at a test database, so WAL mode left
+        # behind by one run cannot leak into the next.
+        db_settings = connections.settings[DEFAULT_DB_ALIAS]
+        saved = copy.deepcopy(db_settings)
+        workdir = Path(tempfile.mkdtemp(prefix="stress-sqlite-"))
+        stress_caches = dict(settings.CACHES)
+        stress_caches["stress"] = {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "expenses-stress",
+        }
+        quiet = [logging.getLogger(name) for name in ("expenses.queries", "django.request")]
+        levels = [logger.level for logger in quiet]
+        for logger in quiet:
+            logger.setLevel(logging.CRITICAL)
+
+        results = {}
+        try:
+            with override_settings(CACHES=stress_caches, GROUP_CACHE_ALIAS="stress"):
+                for name in options["only"] or list(self.profiles):
+                    module = importlib.import_module(self.profiles[name])
+                    profile = module.DATABASES[DEFAULT_DB_ALIAS]
+                    connections.close_all()
+                    db_settings.update(
+                        {
+                            "CONN_MAX_AGE": 0,
+                            "CONN_HEALTH_CHECKS": False,
+                            "OPTIONS": {},
+                            **copy.deepcopy(profile),
+                            "NAME": str(workdir / f"{name}.sqlite3"),
+                        }
+                    )
+                    member_cache.clear()
+                    caches["stress"].clear()
+                    caches[settings.AUTH_USER_CACHE_ALIAS].clear()
+                    results[name] = self._run(options)
+        finally:
+            connections.close_all()
+            db_settings.clear()
+            db_settings.update(saved)
+            for logger, level in zip(quiet, levels):
+                logger.setLevel(level)
+            member_cache.clear()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        self.stdout.write(json.dumps(results, indent=2))
+        self.stdout.write(
+            f"{'profile':<11} {'writes/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'reads/s':>8} {'locked':>7} {'rejected':>9}"
+        )
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<11} {row['writes_per_second']:>9.1f} {row['write_p50_ms']:>8.2f} "
+                f"{row['write_p95_ms']:>8.2f} {row['reads_per_second']:>8.1f} "
+                f"{row['write_lock_errors'] + row['read_lock_errors']:>7} {row['rejected']:>9}"
+            )
+
+    def _run(self, options):
+        call_command("migrate", verbosity=0, interactive=False)
+        call_command(
+            "seed_workload",
+            groups=1,
+            members=max(options["members"], 2),
+            expenses=0,
+            settlements=0,
+            prefix="stress",
+            stdout=io.StringIO(),
+        )
+        group = Group.objects.get(name="stress-0")
+        members = [
+            member.user
+            for member in GroupMember.objects.filter(group=group)
+            .select_related("user")
+            .order_by("id")
+        ]
+        auth = {user.id: f"Bearer {AccessToken.for_user(user)}" for user in members}
+        creditor = members[0]
+
+        # Everybody owes the first member plenty, so the small settlements
+        # below stay valid for the whole run.
+        response = Client().post(
+            "/api/expenses/",
+            json.dumps(
+                {
+                    "group": group.id,
+                    "amount": f"{len(members) * 100000}.00",
+                    "description": "stress opening balance",
+                    "split_type": "equal",
+                }
+            ),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=auth[creditor.id],
+        )
+        if response.status_code != 201:
+            raise CommandError(f"Could not open the stress ledger: {response.content[:200]!r}")
+        connections.close_all()
+
+        writers_done = threading.Event()
+
+        def write_loop(index):
+            user = members[index % len(members)]
+            client = Client()
+            rows = []
+            try:
+                for run in range(options["requests"]):
+                    if run % 4 == 3 and user.id != creditor.id:
+                        url = f"/api/groups/{group.id}/settlements/"
+                        payload = {"to_user": creditor.id, "amount": "1.00", "note": "stress"}
+                    else:
+                        url = "/api/expenses/"
+                        payload = {
+                            "group": group.id,
+                            "amount": "12.00",
+                            "description": f"stress {index}-{run}",
+                            "split_type": "equal",
+                        }
+                    start = time.perf_counter()
+                    try:
+                        response = client.post(
+                            url,
+                            json.dumps(payload),
+                            content_type="application/json",
+                            HTTP_AUTHORIZATION=auth[user.id],
+                        )
+                        outcome = response.status_code
+                    except OperationalError as exc:
+                        if not is_lock_error(exc):
+                            raise
+                        outcome = "locked"
+                    rows.append(((time.perf_counter() - start) * 1000, outcome))
+                    # What the request_finished signal does behind a real server.
+                    close_old_connections()
+            finally:
+                connections.close_all()
+            return rows
+
+        def read_loop(index):
+            user = members[index % len(members)]
+            client = Client()
+            reads = locked = 0
+            try:
+                while not writers_done.is_set():
+                    try:
+                        response = client.get(
+                            f"/api/groups/{group.id}/balances/", HTTP_AUTHORIZATION=auth[user.id]
+                        )
+                    except OperationalError as exc:
+                        if not is_lock_error(exc):
+                            raise
+                        locked += 1
+                    else:
+                        if response.status_code != 200:
+                            raise CommandError(f"Balances read returned {response.status_code}")
+                        reads += 1
+                    close_old_connections()
+            finally:
+                connections.close_all()
+            return reads, locked
+
+        with ThreadPoolExecutor(options["writers"] + options["readers"]) as pool:
+            readers = [pool.submit(read_loop, index) for index in range(options["readers"])]
+            start = time.perf_counter()
+            try:
+                chunks = list(pool.map(write_loop, range(options["writers"])))
+            finally:
+                wall = time.perf_counter() - start
+                writers_done.set()
+            read_rows = [future.result() for future in readers]
+        reads = sum(count for count, _ in read_rows)
+
+        rows = [row for chunk in chunks for row in chunk]
+        written = [ms for ms, outcome in rows if outcome in (200, 201)]
+        if not written:
+            raise CommandError("No write succeeded")
+        return {
+            "writes": len(written),
+            "rejected": sum(1 for _, outcome in rows if isinstance(outcome, int) and outcome >= 400),
+            "write_lock_errors": sum(1 for _, outcome in rows if outcome == "locked"),
+            "seconds": round(wall, 3),
+            "writes_per_second": round(len(written) / wall, 1),
+            "write_p50_ms": round(percentile(written, 50), 3),
+            "write_p95_ms": round(percentile(written, 95), 3),
+            "reads": reads,
+            "reads_per_second": round(reads / wall, 1),
+            "read_lock_errors": sum(locked for _, locked in read_rows),
+        }
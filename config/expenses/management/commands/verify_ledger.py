@@ -0,0 +1,116 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.balances import ZERO, load_member_net
+from expenses.engine import from_cents
+from expenses.ledger import add_deltas, ledger_net
+from expenses.models import (
+    BalanceSnapshot,
+    Group,
+    GroupMember,
+    LedgerEvent,
+    MemberBalance,
+    PairwiseDebt,
+)
+from expenses.views import GroupBalancesView
+
+
+class Command(BaseCommand):
+    help = (
+        "Check the event ledger (latest snapshot plus tail) and the stored balances "
+        "against a full recomputation from expenses and settlements, and the "
+        "pairwise debts against the stored balances"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--group",
+            type=int,
+            action="append",
+            dest="groups",
+            help="Only check the given group id (can be repeated)",
+        )
+        parser.add_argument(
+            "--snapshots",
+            action="store_true",
+            help="Also replay every event from the start to check each stored snapshot",
+        )
+
+    def handle(self, *args, **options):
+        groups = Group.objects.all().order_by("id")
+        if options["groups"]:
+            groups = groups.filter(id__in=options["groups"])
+
+        problems = []
+        count = 0
+        for group in groups.iterator():
+            members = list(GroupMember.objects.filter(group=group).select_related("user"))
+            expected, _ = GroupBalancesView()._compute_group_net(group, members)
+            seq, net = ledger_net(group)
+            ledger = {uid: from_cents(cents) for uid, cents in net.items()}
+            stored = load_member_net(group, members)
+
+            for uid in sorted(set(expected) | set(ledger)):
+                want = expected.get(uid, ZERO)
+                if ledger.get(uid, ZERO) != want:
+                    problems.append(
+                        f"group {group.id} user {uid}: ledger at #{seq} has "
+                        f"{ledger.get(uid, ZERO)}, expected {want}"
+                    )
+                if uid in stored and stored[uid] != want:
+                    problems.append(
+                        f"group {group.id} user {uid}: stored balance {stored[uid]}, "
+                        f"expected {want}"
+                    )
+            problems.extend(self._check_pairs(group))
+            if options["snapshots"]:
+                problems.extend(self._check_snapshots(group))
+            count += 1
+
+        for problem in problems:
+            self.stderr.write(problem)
+        if problems:
+            raise CommandError(f"{len(problems)} mismatch(es) in {count} group(s)")
+        self.stdout.write(self.style.SUCCESS(f"Ledger matches for {count} group(s)"))
+
+    def _check_pairs(self, group):
+        # A user's pair rows must add up to their stored balance.
+        stored = dict(
+            MemberBalance.objects.filter(group=group).values_list("user_id", "net_amount")
+        )
+        pairs = {}
+        for debtor_id, creditor_id, amount in PairwiseDebt.objects.filter(group=group).values_list(
+            "debtor_id", "creditor_id", "amount"
+        ):
+            pairs[debtor_id] = pairs.get(debtor_id, ZERO) - amount
+            pairs[creditor_id] = pairs.get(creditor_id, ZERO) + amount
+        return [
+            f"group {group.id} user {uid}: pairwise debts add up to "
+            f"{pairs.get(uid, ZERO)}, stored balance {stored.get(uid, ZERO)}"
+            for uid in sorted(set(stored) | set(pairs))
+            if pairs.get(uid, ZERO) != stored.get(uid, ZERO)
+        ]
+
+    def _check_snapshots(self, group):
+        snapshots = dict(
+            BalanceSnapshot.objects.filter(group=group).values_list("seq", "nets")
+        )
+        problems = []
+        net = {}
+        expected_seq = 1
+        events = (
+            LedgerEvent.objects.filter(group=group).order_by("seq").values_list("seq", "deltas")
+        )
+        for seq, deltas in events.iterator(chunk_size=2000):
+            if seq != expected_seq:
+                problems.append(f"group {group.id}: event #{expected_seq} is missing")
+            expected_seq = seq + 1
+            add_deltas(net, deltas)
+            stored = snapshots.pop(seq, None)
+            if stored is not None:
+                replayed = {str(uid): cents for uid, cents in net.items() if cents}
+                if stored != replayed:
+                    problems.append(f"group {group.id}: snapshot #{seq} differs from replay")
+        problems.extend(
+            f"group {group.id}: snapshot #{seq} is past the last event" for seq in sorted(snapshots)
+        )
+        return problems
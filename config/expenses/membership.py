@@ -0,0 +1,112 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import permissions
+
+from .models import Group, GroupMember
+
+
+class MemberIds(tuple):
+    # Member user ids in join order, which equal splits follow, with a frozenset
+    # behind `in` so membership checks do not scan the tuple.
+
+    def __new__(cls, ids):
+        member_ids = super().__new__(cls, ids)
+        member_ids._set = frozenset(member_ids)
+        return member_ids
+
+    def __contains__(self, user_id):
+        return user_id in self._set
+
+
+class MemberIdCache:
+    # LRU of group id -> (members_revision, MemberIds). Entries are tagged with
+    # Group.members_revision, which only membership changes move, so expense
+    # and settlement writes do not evict them. A process that never saw an
+    # invalidation still cannot serve an old member set to a request holding
+    # the current group row.
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, group):
+        member_ids = self._lookup(group)
+        if member_ids is None:
+            member_ids = MemberIds(self._queryset(group))
+            self._store(group, member_ids)
+        return member_ids
+
+    async def aget(self, group):
+        member_ids = self._lookup(group)
+        if member_ids is None:
+            member_ids = MemberIds([uid async for uid in self._queryset(group)])
+            self._store(group, member_ids)
+        return member_ids
+
+    def _queryset(self, group):
+        return (
+            GroupMember.objects.filter(group=group)
+            .order_by("id")
+            .values_list("user_id", flat=True)
+        )
+
+    def _lookup(self, group):
+        with self._lock:
+            entry = self._entries.get(group.pk)
+            if entry is not None and entry[0] == group.members_revision:
+                self._entries.move_to_end(group.pk)
+                return entry[1]
+        return None
+
+    def _store(self, group, member_ids):
+        with self._lock:
+            self._entries[group.pk] = (group.members_revision, member_ids)
+            self._entries.move_to_end(group.pk)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, group_id):
+        with self._lock:
+            self._entries.pop(group_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+member_cache = MemberIdCache(getattr(settings, "MEMBERSHIP_CACHE_SIZE", 1024))
+
+
+def group_member_ids(group):
+    return member_cache.get(group)
+
+
+def is_group_member(group, user_id):
+    return user_id in member_cache.get(group)
+
+
+async def ais_group_member(group, user_id):
+    return user_id in await member_cache.aget(group)
+
+
+def invalidate_group_members(group):
+    # Call inside the transaction that adds the member, after
+    # bump_group_revision: the change's revision becomes the membership
+    # revision other processes compare against. Dropping the local entry
+    # before commit would let a concurrent reader cache the old set again.
+    Group.objects.filter(pk=group.pk).update(members_revision=group.revision)
+    group.members_revision = group.revision
+    group_id = group.pk
+    transaction.on_commit(lambda: member_cache.invalidate(group_id))
+
+
+class IsGroupMember(permissions.BasePermission):
+    # Object permission on Group; views call check_object_permissions(request, group).
+    message = "Not a group member"
+
+    def has_object_permission(self, request, view, obj):
+        return is_group_member(obj, request.user.id)
@@ -0,0 +1,155 @@
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+SHARDS = 16
+
+
+class MetricsRegistry:
+    # Threads write to one of a fixed number of shards, picked by thread id,
+    # so concurrent requests rarely wait on the same lock and the registry
+    # does not grow with every thread a server starts.
+
+    def __init__(self, buckets=LATENCY_BUCKETS, shards=SHARDS):
+        self.buckets = buckets
+        self._shards = [
+            {"lock": threading.Lock(), "counters": {}, "histograms": {}} for _ in range(shards)
+        ]
+        self._help = {}
+
+    def describe(self, name, kind, text):
+        self._help[name] = (kind, text)
+
+    def _shard(self):
+        # Native ids are small sequential numbers, unlike get_ident(), which is
+        # an aligned address and would put most threads in the same shard.
+        return self._shards[threading.get_native_id() % len(self._shards)]
+
+    def inc(self, name, labels=(), amount=1):
+        shard = self._shard()
+        key = (name, labels)
+        with shard["lock"]:
+            counters = shard["counters"]
+            counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        shard = self._shard()
+        key = (name, labels)
+        with shard["lock"]:
+            entry = shard["histograms"].get(key)
+            if entry is None:
+                entry = [[0] * len(self.buckets), 0.0, 0]
+                shard["histograms"][key] = entry
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def _merged(self):
+        counters = {}
+        histograms = {}
+        for shard in self._shards:
+            with shard["lock"]:
+                for key, value in shard["counters"].items():
+                    counters[key] = counters.get(key, 0) + value
+                for key, (buckets, total, count) in shard["histograms"].items():
+                    merged = histograms.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+                    for index, bucket in enumerate(buckets):
+                        merged[0][index] += bucket
+                    merged[1] += total
+                    merged[2] += count
+        return counters, histograms
+
+    def render(self):
+        counters, histograms = self._merged()
+        lines = []
+        described = set()
+
+        def header(name, default_kind):
+            if name in described:
+                return
+            described.add(name)
+            kind, text = self._help.get(name, (default_kind, ""))
+            if text:
+                lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+
+        for (name, labels), (buckets, total, count) in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, buckets):
+                cumulative += bucket
+                lines.append(f"{name}_bucket{_labels(labels + (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+registry = MetricsRegistry()
+registry.describe("http_requests_total", "counter", "API requests by route, method and status")
+registry.describe(
+    "http_request_duration_seconds", "histogram", "API request latency by route, method and status"
+)
+registry.describe("expenses_created_total", "counter", "Expenses written")
+registry.describe("expense_splits_written_total", "counter", "Expense split rows written")
+registry.describe("settlements_created_total", "counter", "Settlements recorded")
+registry.describe("settlements_rejected_total", "counter", "Settlements rejected by validation reason")
+registry.describe("group_cache_requests_total", "counter", "Group response cache lookups by result")
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - start)
+        return response
+
+    def _record(self, request, response, elapsed):
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match is not None else "unmatched"
+        labels = (
+            ("route", route),
+            ("method", request.method),
+            ("status", str(response.status_code)),
+        )
+        registry.inc("http_requests_total", labels)
+        registry.observe("http_request_duration_seconds", labels, elapsed)
@@ -0,0 +1,124 @@
+import json
+import logging
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+
+
+logger = logging.getLogger("expenses.queries")
+
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+
+
+def _shape(sql):
+    # Parameters are already placeholders; only IN lists vary in length.
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_sql = ""
+        self.shapes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.total += elapsed
+            if elapsed > self.slowest:
+                self.slowest = elapsed
+                self.slowest_sql = sql
+            shape = _shape(sql)
+            self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    def repeated(self, threshold):
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+
+class QueryInstrumentationMiddleware:
+    # Works with DEBUG off: queries are timed through execute_wrapper rather
+    # than connection.queries. Queries run while a StreamingHttpResponse is
+    # being consumed happen after this returns and are not counted.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, "QUERY_INSTRUMENTATION", True):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        self._report(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, "QUERY_INSTRUMENTATION", True):
+            return await self.get_response(request)
+
+        # The async ORM runs queries on the request's sync thread, whose
+        # connection is not the one visible here; install the wrapper there.
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        await sync_to_async(_add_wrapper)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_remove_wrapper)(recorder)
+        self._report(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    def _report(self, request, response, recorder, elapsed):
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={recorder.total * 1000:.1f};desc="{recorder.count} queries"',
+                f"db-slowest;dur={recorder.slowest * 1000:.1f}",
+                f"total;dur={elapsed * 1000:.1f}",
+            ]
+        )
+
+        threshold = getattr(settings, "QUERY_N_PLUS_ONE_THRESHOLD", 10)
+        repeated = recorder.repeated(threshold)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": recorder.count,
+            "db_ms": round(recorder.total * 1000, 2),
+            "total_ms": round(elapsed * 1000, 2),
+            "slowest_ms": round(recorder.slowest * 1000, 2),
+            "slowest_sql": recorder.slowest_sql,
+        }
+        if repeated:
+            record["repeated_queries"] = [
+                {"count": count, "sql": shape}
+                for shape, count in sorted(repeated.items(), key=lambda item: -item[1])
+            ]
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+
+
+def _add_wrapper(recorder):
+    connection.execute_wrappers.append(recorder)
+
+
+def _remove_wrapper(recorder):
+    connection.execute_wrappers.remove(recorder)
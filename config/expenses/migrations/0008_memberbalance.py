@@ -0,0 +1,97 @@
+# Generated by Django — MemberBalance ledger for group balances
+
+from decimal import Decimal
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_member_balances(apps, schema_editor):
+    Group = apps.get_model("expenses", "Group")
+    GroupMember = apps.get_model("expenses", "GroupMember")
+    ExpensePayment = apps.get_model("expenses", "ExpensePayment")
+    ExpenseSplit = apps.get_model("expenses", "ExpenseSplit")
+    Settlement = apps.get_model("expenses", "Settlement")
+    MemberBalance = apps.get_model("expenses", "MemberBalance")
+
+    for group in Group.objects.all():
+        net = {
+            uid: Decimal("0.00")
+            for uid in GroupMember.objects.filter(group=group).values_list("user_id", flat=True)
+        }
+        for uid, amount in ExpensePayment.objects.filter(
+            expense__group=group
+        ).values_list("user_id", "amount"):
+            net[uid] = net.get(uid, Decimal("0.00")) + amount
+        for uid, amount in ExpenseSplit.objects.filter(
+            expense__group=group
+        ).values_list("user_id", "share_amount"):
+            net[uid] = net.get(uid, Decimal("0.00")) - amount
+        for from_id, to_id, amount in Settlement.objects.filter(group=group).values_list(
+            "from_user_id", "to_user_id", "amount"
+        ):
+            net[from_id] = net.get(from_id, Decimal("0.00")) + amount
+            net[to_id] = net.get(to_id, Decimal("0.00")) - amount
+
+        MemberBalance.objects.bulk_create(
+            [
+                MemberBalance(
+                    group=group,
+                    user_id=uid,
+                    net_amount=amount.quantize(Decimal("0.01")),
+                )
+                for uid, amount in net.items()
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("expenses", "0007_settlement_note"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MemberBalance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "net_amount",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=12
+                    ),
+                ),
+                (
+                    "group",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="member_balances",
+                        to="expenses.group",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="member_balances",
+                        to="expenses.user",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("group", "user")},
+            },
+        ),
+        migrations.RunPython(
+            backfill_member_balances,
+            migrations.RunPython.noop,
+        ),
+    ]
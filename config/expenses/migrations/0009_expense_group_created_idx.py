@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0008_memberbalance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['group', '-created_at', '-id'], name='expense_group_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0009_expense_group_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
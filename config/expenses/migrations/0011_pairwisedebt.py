@@ -0,0 +1,127 @@
+# Generated by Django — PairwiseDebt ledger for who owes whom
+
+from decimal import Decimal
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_pairwise_debts(apps, schema_editor):
+    Group = apps.get_model("expenses", "Group")
+    ExpensePayment = apps.get_model("expenses", "ExpensePayment")
+    ExpenseSplit = apps.get_model("expenses", "ExpenseSplit")
+    Settlement = apps.get_model("expenses", "Settlement")
+    PairwiseDebt = apps.get_model("expenses", "PairwiseDebt")
+
+    for group in Group.objects.all():
+        payments_by_expense = {}
+        for expense_id, user_id, amount in (
+            ExpensePayment.objects.filter(expense__group=group)
+            .order_by("id")
+            .values_list("expense_id", "user_id", "amount")
+        ):
+            payments_by_expense.setdefault(expense_id, []).append((user_id, amount))
+
+        # Signed amount per (low id, high id): positive means low owes high.
+        debts = {}
+
+        def add(debtor_id, creditor_id, amount):
+            if debtor_id == creditor_id or not amount:
+                return
+            if debtor_id < creditor_id:
+                key = (debtor_id, creditor_id)
+            else:
+                key, amount = (creditor_id, debtor_id), -amount
+            debts[key] = debts.get(key, Decimal("0.00")) + amount
+
+        for expense_id, user_id, share in ExpenseSplit.objects.filter(
+            expense__group=group
+        ).values_list("expense_id", "user_id", "share_amount"):
+            payments = payments_by_expense.get(expense_id, [])
+            total = sum((amount for _, amount in payments), Decimal("0.00"))
+            if not total:
+                continue
+            remaining = share
+            for index, (payer_id, paid) in enumerate(payments):
+                if index == len(payments) - 1:
+                    portion = remaining
+                else:
+                    portion = (share * paid / total).quantize(Decimal("0.01"))
+                    remaining -= portion
+                add(user_id, payer_id, portion)
+
+        for from_id, to_id, amount in Settlement.objects.filter(group=group).values_list(
+            "from_user_id", "to_user_id", "amount"
+        ):
+            add(from_id, to_id, -amount)
+
+        PairwiseDebt.objects.bulk_create(
+            [
+                PairwiseDebt(
+                    group=group,
+                    debtor_id=low if amount > 0 else high,
+                    creditor_id=high if amount > 0 else low,
+                    amount=abs(amount).quantize(Decimal("0.01")),
+                )
+                for (low, high), amount in debts.items()
+                if amount.quantize(Decimal("0.01"))
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("expenses", "0010_group_revision"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PairwiseDebt",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=12)),
+                (
+                    "creditor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="debts_due",
+                        to="expenses.user",
+                    ),
+                ),
+                (
+                    "debtor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="debts_owed",
+                        to="expenses.user",
+                    ),
+                ),
+                (
+                    "group",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pairwise_debts",
+                        to="expenses.group",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["group", "creditor"], name="debt_group_creditor_idx")
+                ],
+                "unique_together": {("group", "debtor", "creditor")},
+            },
+        ),
+        migrations.RunPython(
+            backfill_pairwise_debts,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django — per-user balance rollup for the dashboard summary
+
+from decimal import Decimal
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_user_summaries(apps, schema_editor):
+    MemberBalance = apps.get_model("expenses", "MemberBalance")
+    UserBalanceSummary = apps.get_model("expenses", "UserBalanceSummary")
+
+    totals = {}
+    for user_id, currency, net in MemberBalance.objects.values_list(
+        "user_id", "group__currency", "net_amount"
+    ):
+        owed, owing = totals.get((user_id, currency), (Decimal("0.00"), Decimal("0.00")))
+        if net > 0:
+            owed += net
+        elif net < 0:
+            owing -= net
+        totals[(user_id, currency)] = (owed, owing)
+
+    UserBalanceSummary.objects.bulk_create(
+        [
+            UserBalanceSummary(
+                user_id=user_id,
+                currency=currency,
+                total_owed=owed,
+                total_owing=owing,
+            )
+            for (user_id, currency), (owed, owing) in totals.items()
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("expenses", "0011_pairwisedebt"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserBalanceSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("currency", models.CharField(max_length=8)),
+                (
+                    "total_owed",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=14
+                    ),
+                ),
+                (
+                    "total_owing",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=14
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balance_summaries",
+                        to="expenses.user",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("user", "currency")},
+            },
+        ),
+        migrations.RunPython(
+            backfill_user_summaries,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 6.0 on 2026-10-18 10:16
+
+from django.db import migrations, models
+
+
+def stamp_existing_rows(apps, schema_editor):
+    # Give every existing row a sequence above 0 so a client syncing with
+    # since=0 receives the group's full history.
+    Group = apps.get_model("expenses", "Group")
+    GroupMember = apps.get_model("expenses", "GroupMember")
+    Expense = apps.get_model("expenses", "Expense")
+    ExpensePayment = apps.get_model("expenses", "ExpensePayment")
+    ExpenseSplit = apps.get_model("expenses", "ExpenseSplit")
+    Settlement = apps.get_model("expenses", "Settlement")
+
+    for group in Group.objects.all():
+        group.revision += 1
+        group.save(update_fields=["revision"])
+        GroupMember.objects.filter(group=group).update(change_seq=group.revision)
+        Expense.objects.filter(group=group).update(change_seq=group.revision)
+        ExpensePayment.objects.filter(expense__group=group).update(change_seq=group.revision)
+        ExpenseSplit.objects.filter(expense__group=group).update(change_seq=group.revision)
+        Settlement.objects.filter(group=group).update(change_seq=group.revision)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0012_userbalancesummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='expensepayment',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='expensesplit',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='groupmember',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='settlement',
+            name='change_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['group', 'change_seq'], name='expense_group_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupmember',
+            index=models.Index(fields=['group', 'change_seq'], name='member_group_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='settlement',
+            index=models.Index(fields=['group', 'change_seq'], name='settlement_group_seq_idx'),
+        ),
+        migrations.RunPython(stamp_existing_rows, migrations.RunPython.noop),
+    ]
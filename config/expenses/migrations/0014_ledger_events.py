@@ -0,0 +1,126 @@
+# Generated by Django 6.0 on 2026-10-18 10:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+
+
+def _cents(field):
+    return Cast(Round(F(field) * 100), output_field=BigIntegerField())
+
+
+def backfill_ledger(apps, schema_editor):
+    # Replays existing expenses and settlements per group in write order
+    # (change_seq, time, expenses first), snapshotting like append_events.
+    Group = apps.get_model("expenses", "Group")
+    Expense = apps.get_model("expenses", "Expense")
+    ExpensePayment = apps.get_model("expenses", "ExpensePayment")
+    ExpenseSplit = apps.get_model("expenses", "ExpenseSplit")
+    Settlement = apps.get_model("expenses", "Settlement")
+    LedgerEvent = apps.get_model("expenses", "LedgerEvent")
+    BalanceSnapshot = apps.get_model("expenses", "BalanceSnapshot")
+    interval = getattr(settings, "LEDGER_SNAPSHOT_INTERVAL", 500)
+
+    for group in Group.objects.all():
+        deltas = {}
+        for model, field, sign in (
+            (ExpensePayment, "amount", 1),
+            (ExpenseSplit, "share_amount", -1),
+        ):
+            rows = model.objects.filter(expense__group=group).values_list(
+                "expense_id", "user_id", _cents(field)
+            )
+            for expense_id, uid, cents in rows:
+                entry = deltas.setdefault(expense_id, {})
+                entry[str(uid)] = entry.get(str(uid), 0) + sign * cents
+
+        history = [
+            (change_seq, created_at, 0, expense_id, deltas.get(expense_id, {}))
+            for expense_id, change_seq, created_at in Expense.objects.filter(
+                group=group
+            ).values_list("id", "change_seq", "created_at")
+        ]
+        settlements = Settlement.objects.filter(group=group).values_list(
+            "id", "change_seq", "date", "from_user_id", "to_user_id", _cents("amount")
+        )
+        history.extend(
+            (change_seq, date, 1, settlement_id, {str(from_id): cents, str(to_id): -cents})
+            for settlement_id, change_seq, date, from_id, to_id, cents in settlements
+        )
+        history.sort(key=lambda row: row[:4])
+
+        events = []
+        snapshots = []
+        net = {}
+        for seq, (change_seq, occurred_at, order, source_id, event_deltas) in enumerate(history, 1):
+            event_deltas = {uid: cents for uid, cents in event_deltas.items() if cents}
+            events.append(
+                LedgerEvent(
+                    group=group,
+                    seq=seq,
+                    kind="settlement" if order else "expense",
+                    expense_id=None if order else source_id,
+                    settlement_id=source_id if order else None,
+                    deltas=event_deltas,
+                    occurred_at=occurred_at,
+                    change_seq=change_seq,
+                )
+            )
+            for uid, cents in event_deltas.items():
+                net[uid] = net.get(uid, 0) + cents
+            if interval and seq % interval == 0:
+                snapshots.append(
+                    BalanceSnapshot(
+                        group=group,
+                        seq=seq,
+                        nets={uid: cents for uid, cents in net.items() if cents},
+                        occurred_at=occurred_at,
+                    )
+                )
+        LedgerEvent.objects.bulk_create(events, batch_size=2000)
+        BalanceSnapshot.objects.bulk_create(snapshots)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0013_change_seq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveBigIntegerField()),
+                ('nets', models.JSONField()),
+                ('occurred_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='expenses.group')),
+            ],
+            options={
+                'unique_together': {('group', 'seq')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveBigIntegerField()),
+                ('kind', models.CharField(choices=[('expense', 'Expense'), ('settlement', 'Settlement')], max_length=20)),
+                ('deltas', models.JSONField()),
+                ('occurred_at', models.DateTimeField()),
+                ('change_seq', models.PositiveBigIntegerField(default=0)),
+                ('expense', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_events', to='expenses.expense')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_events', to='expenses.group')),
+                ('settlement', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_events', to='expenses.settlement')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['group', 'occurred_at'], name='ledger_group_occurred_idx')],
+                'unique_together': {('group', 'seq')},
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
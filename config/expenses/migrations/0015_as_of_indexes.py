@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0014_ledger_events'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ledgerevent',
+            name='ledger_group_occurred_idx',
+        ),
+        migrations.AddIndex(
+            model_name='ledgerevent',
+            index=models.Index(fields=['group', 'occurred_at', 'seq'], name='ledger_group_occurred_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='settlement',
+            index=models.Index(fields=['group', 'date'], name='settlement_group_date_idx'),
+        ),
+    ]
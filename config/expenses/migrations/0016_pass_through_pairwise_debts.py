@@ -0,0 +1,58 @@
+# Generated by Django — re-derive pairwise debts so nobody both owes and is owed
+
+from django.db import migrations
+
+
+def rebuild_pairwise_debts(apps, schema_editor):
+    # Earlier rows kept every settlement as its own reversed pair, so a user
+    # could show debts in a settled group. Rebuild each group's rows from the
+    # stored balances: users who are behind owe users who are ahead, largest
+    # amounts first, as balances.match_debts does.
+    Group = apps.get_model("expenses", "Group")
+    MemberBalance = apps.get_model("expenses", "MemberBalance")
+    PairwiseDebt = apps.get_model("expenses", "PairwiseDebt")
+
+    for group in Group.objects.all():
+        net = dict(
+            MemberBalance.objects.filter(group=group).values_list("user_id", "net_amount")
+        )
+        debtors = sorted(
+            ([-amount, uid] for uid, amount in net.items() if amount < 0),
+            key=lambda item: (-item[0], item[1]),
+        )
+        creditors = sorted(
+            ([amount, uid] for uid, amount in net.items() if amount > 0),
+            key=lambda item: (-item[0], item[1]),
+        )
+
+        rows = []
+        d = c = 0
+        while d < len(debtors) and c < len(creditors):
+            amount = min(debtors[d][0], creditors[c][0])
+            rows.append(
+                PairwiseDebt(
+                    group=group,
+                    debtor_id=debtors[d][1],
+                    creditor_id=creditors[c][1],
+                    amount=amount,
+                )
+            )
+            debtors[d][0] -= amount
+            creditors[c][0] -= amount
+            if not debtors[d][0]:
+                d += 1
+            if not creditors[c][0]:
+                c += 1
+
+        PairwiseDebt.objects.filter(group=group).delete()
+        PairwiseDebt.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("expenses", "0015_as_of_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_pairwise_debts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0016_pass_through_pairwise_debts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='members_revision',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
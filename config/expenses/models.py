@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 from django.conf import settings
+from decimal import Decimal
 
 
 
@@ -22,6 +23,9 @@ class Group(models.Model):
     currency = models.CharField(max_length=8, default = 'NPR')
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_groups')
     created_at = models.DateTimeField(auto_now_add=True)
+    revision = models.PositiveBigIntegerField(default=0)
+    # Revision of the last membership change; tags the cached member ids.
+    members_revision = models.PositiveBigIntegerField(default=0)
 
     def __str__(self):
         return self.name
@@ -31,10 +35,14 @@ class GroupMember(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='group_memberships')
     group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='members')
     joined_at = models.DateTimeField(auto_now_add=True)
+    change_seq = models.PositiveBigIntegerField(default=0)
 
     class Meta:
         unique_together = ['user', 'group']
         ordering = ['joined_at']
+        indexes = [
+            models.Index(fields=["group", "change_seq"], name="member_group_seq_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.name} in {self.group.name}"
@@ -51,6 +59,16 @@ class Expense(models.Model):
     description = models.CharField(max_length=255)
     split_type = models.CharField(max_length=20, choices=SPLIT_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
+    change_seq = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["group", "-created_at", "-id"],
+                name="expense_group_created_idx",
+            ),
+            models.Index(fields=["group", "change_seq"], name="expense_group_seq_idx"),
+        ]
 
     def __str__(self):
         return f"{self.description} - {self.amount}"
@@ -59,6 +77,7 @@ class ExpenseSplit(models.Model):
     expense = models.ForeignKey(Expense, on_delete=models.CASCADE, related_name="splits")
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="expense_splits")
     share_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    change_seq = models.PositiveBigIntegerField(default=0, db_index=True)
 
     def __str__(self):
         return f"{self.user.email} owes {self.share_amount}"
@@ -69,6 +88,7 @@ class ExpensePayment(models.Model):
     expense = models.ForeignKey(Expense, on_delete=models.CASCADE, related_name="payments")
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="expense_payments")
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    change_seq = models.PositiveBigIntegerField(default=0, db_index=True)
 
     class Meta:
         unique_together = ["expense", "user"]
@@ -89,9 +109,102 @@ class Settlement(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     date = models.DateTimeField(auto_now_add=True)
     note = models.CharField(max_length=255, blank=True, default="")
+    change_seq = models.PositiveBigIntegerField(default=0)
 
     class Meta:
         ordering = ["-date"]
+        indexes = [
+            models.Index(fields=["group", "change_seq"], name="settlement_group_seq_idx"),
+            models.Index(fields=["group", "date"], name="settlement_group_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.from_user.email} paid {self.to_user.email} {self.amount}"
+
+
+class MemberBalance(models.Model):
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name="member_balances")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="member_balances")
+    net_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        unique_together = ["group", "user"]
+
+    def __str__(self):
+        return f"{self.user.email} net {self.net_amount} in {self.group.name}"
+
+
+class PairwiseDebt(models.Model):
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name="pairwise_debts")
+    debtor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="debts_owed")
+    creditor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="debts_due")
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        unique_together = ["group", "debtor", "creditor"]
+        indexes = [
+            models.Index(fields=["group", "creditor"], name="debt_group_creditor_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.debtor.email} owes {self.creditor.email} {self.amount}"
+
+
+class UserBalanceSummary(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="balance_summaries")
+    currency = models.CharField(max_length=8)
+    total_owed = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    total_owing = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        unique_together = ["user", "currency"]
+
+    def __str__(self):
+        return f"{self.user.email} {self.currency}: owed {self.total_owed}, owes {self.total_owing}"
+
+
+class LedgerEvent(models.Model):
+    # Append-only: one row per expense or settlement, numbered per group in
+    # the order they were written. deltas maps user id -> net change in cents.
+    KIND_CHOICES = (
+        ("expense", "Expense"),
+        ("settlement", "Settlement"),
+    )
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name="ledger_events")
+    seq = models.PositiveBigIntegerField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    expense = models.ForeignKey(
+        Expense, on_delete=models.SET_NULL, null=True, blank=True, related_name="ledger_events"
+    )
+    settlement = models.ForeignKey(
+        Settlement, on_delete=models.SET_NULL, null=True, blank=True, related_name="ledger_events"
+    )
+    deltas = models.JSONField()
+    occurred_at = models.DateTimeField()
+    change_seq = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ["group", "seq"]
+        indexes = [
+            models.Index(
+                fields=["group", "occurred_at", "seq"], name="ledger_group_occurred_seq_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.group.name} #{self.seq} {self.kind}"
+
+
+class BalanceSnapshot(models.Model):
+    # Net balance per user (cents) after applying every event up to seq.
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name="balance_snapshots")
+    seq = models.PositiveBigIntegerField()
+    nets = models.JSONField()
+    occurred_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ["group", "seq"]
+
+    def __str__(self):
+        return f"{self.group.name} balances at #{self.seq}"
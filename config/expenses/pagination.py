@@ -0,0 +1,77 @@
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class ExpenseCursorPagination:
+    # Keyset pagination over (created_at, id), newest first. Each page is a
+    # range read on expense_group_created_idx, however deep the cursor is.
+    default_page_size = 50
+    max_page_size = 200
+
+    def __init__(self, request):
+        self.request = request
+
+    @property
+    def params(self):
+        # DRF requests expose query_params; plain Django (async) views only GET.
+        return getattr(self.request, "query_params", self.request.GET)
+
+    def is_requested(self):
+        params = self.params
+        return "cursor" in params or "page_size" in params
+
+    def get_page_size(self):
+        try:
+            size = int(self.params.get("page_size", self.default_page_size))
+        except (TypeError, ValueError):
+            raise ValueError("page_size must be a positive integer")
+        if size <= 0:
+            raise ValueError("page_size must be a positive integer")
+        return min(size, self.max_page_size)
+
+    def paginate(self, queryset):
+        page_size = self.get_page_size()
+        return self._finish(list(self._window(queryset, page_size)), page_size)
+
+    async def apaginate(self, queryset):
+        page_size = self.get_page_size()
+        return self._finish([row async for row in self._window(queryset, page_size)], page_size)
+
+    def _window(self, queryset, page_size):
+        queryset = queryset.order_by("-created_at", "-id")
+
+        raw = self.params.get("cursor")
+        if raw:
+            created_at, pk = decode_cursor(raw)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+        return queryset[: page_size + 1]
+
+    def _finish(self, page, page_size):
+        next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            next_cursor = encode_cursor(page[-1])
+        return page, next_cursor
+
+
+def encode_cursor(expense):
+    raw = f"{expense.created_at.isoformat()}|{expense.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(value):
+    try:
+        raw = base64.urlsafe_b64decode(value.encode()).decode()
+        created_at, pk = raw.split("|")
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if created_at is None:
+        raise ValueError("Invalid cursor")
+    return created_at, pk
@@ -33,21 +33,33 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
 
 class GroupSerializer(serializers.ModelSerializer):
-    members_count = serializers.IntegerField(
-    source='members.count', read_only=True)
+    # members_count, is_creator and my_net_balance are read from annotations
+    # when GroupListCreateView provides them, so listing groups is one query.
+    members_count = serializers.SerializerMethodField()
     created_by = serializers.IntegerField(
-        source = 'created_by.id', read_only = True)
+        source = 'created_by_id', read_only = True)
     is_creator = serializers.SerializerMethodField()
+    my_net_balance = serializers.SerializerMethodField()
     class Meta:
         model = Group
-        fields = ('id', 'name', 'currency', 'members_count', 'created_by', 'is_creator', 'created_at')
-    
+        fields = ('id', 'name', 'currency', 'members_count', 'created_by', 'is_creator', 'my_net_balance', 'created_at')
+
+    def get_members_count(self, obj):
+        if hasattr(obj, 'members_total'):
+            return obj.members_total
+        return obj.members.count()
+
     def get_is_creator(self, obj):
+        if hasattr(obj, 'created_by_caller'):
+            return obj.created_by_caller
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.created_by == request.user
+            return obj.created_by_id == request.user.id
         return False
 
+    def get_my_net_balance(self, obj):
+        return float(getattr(obj, 'caller_net', None) or 0)
+
 class GroupMemberSerializer(serializers.ModelSerializer):
     class Meta:
         model = GroupMember
@@ -94,6 +106,17 @@ class ExpenseSerializer(serializers.ModelSerializer):
             return "Multiple payers"
         return obj.paid_by.name if obj.paid_by else None
 
+class ExpenseImportRowSerializer(serializers.Serializer):
+    description = serializers.CharField(max_length=255)
+    amount = serializers.DecimalField(max_digits=8, decimal_places=2)
+    split_type = serializers.ChoiceField(choices=Expense.SPLIT_CHOICES)
+    payments = serializers.ListField(
+        child=serializers.DictField(), required=False, allow_null=True
+    )
+    splits = serializers.ListField(
+        child=serializers.DictField(), required=False, allow_null=True
+    )
+
 class GroupMemberNameSerializer(serializers.ModelSerializer):
     name = serializers.CharField(source="user.name")
     user_id = serializers.IntegerField(source="user.id")
@@ -120,7 +143,9 @@ class GroupDetailSerializer(serializers.ModelSerializer):
 
     def get_members(self, obj):
         try:
-            group_members = obj.members.select_related('user').all()
+            group_members = self.context.get('members')
+            if group_members is None:
+                group_members = obj.members.select_related('user').all()
             serializer = GroupMemberNameSerializer(group_members, many=True)
             return serializer.data
         except Exception as e:
@@ -130,14 +155,20 @@ class GroupDetailSerializer(serializers.ModelSerializer):
             return []
 
     def get_members_count(self, obj):
+        members = self.context.get('members')
+        if members is not None:
+            return len(members)
         return obj.members.count()
 
     def get_total_expense(self, obj):
-        total = (
-            Expense.objects.filter(group=obj)
-            .aggregate(total=models.Sum("amount"))["total"]
-            or 0
-        )
+        if 'total_expense' in self.context:
+            total = self.context['total_expense']
+        else:
+            total = (
+                Expense.objects.filter(group=obj)
+                .aggregate(total=models.Sum("amount"))["total"]
+                or 0
+            )
         return float(total) if total else 0
 
 
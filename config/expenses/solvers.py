@@ -0,0 +1,186 @@
+import heapq
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .engine import from_cents, to_cents
+
+
+def _nonzero_cents(net):
+    cents = {}
+    for user_id, balance in net.items():
+        value = to_cents(balance)
+        if value:
+            cents[user_id] = value
+    return cents
+
+
+def _transfer(from_user, to_user, cents):
+    return {
+        "from_user": from_user,
+        "to_user": to_user,
+        "amount": float(from_cents(cents)),
+    }
+
+
+def _greedy_transfers(cents):
+    # Largest debtor pays largest creditor; ties broken by user id so the same
+    # balances always give the same plan.
+    creditors = [(-amount, uid) for uid, amount in cents.items() if amount > 0]
+    debtors = [(amount, uid) for uid, amount in cents.items() if amount < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+
+    transfers = []
+    while creditors and debtors:
+        gets, creditor_id = heapq.heappop(creditors)
+        owes, debtor_id = heapq.heappop(debtors)
+        amount = min(-gets, -owes)
+        transfers.append(_transfer(debtor_id, creditor_id, amount))
+        if -gets > amount:
+            heapq.heappush(creditors, (gets + amount, creditor_id))
+        if -owes > amount:
+            heapq.heappush(debtors, (owes + amount, debtor_id))
+    return transfers
+
+
+def greedy_settlements(net):
+    return _greedy_transfers(_nonzero_cents(net))
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+def _check_deadline(deadline):
+    if deadline is not None and time.perf_counter() > deadline:
+        raise _OutOfTime
+
+
+def _peel_pairs(cents):
+    # A debtor and creditor with exactly opposite balances always settle
+    # in one transfer in some optimal plan, so take them out first.
+    by_amount = {}
+    groups = []
+    rest = {}
+    for uid in sorted(cents):
+        amount = cents[uid]
+        waiting = by_amount.get(-amount)
+        if waiting:
+            other = waiting.pop()
+            rest.pop(other)
+            groups.append({other: -amount, uid: amount})
+        else:
+            by_amount.setdefault(amount, []).append(uid)
+            rest[uid] = amount
+    return groups, rest
+
+
+def _peel_triples(cents, deadline):
+    groups = []
+    rest = dict(cents)
+    uids = sorted(rest)
+    for i, a in enumerate(uids):
+        if a not in rest:
+            continue
+        lookup = {}
+        for b in uids[i + 1:]:
+            if b not in rest:
+                continue
+            _check_deadline(deadline)
+            c = lookup.get(-(rest[a] + rest[b]))
+            if c is not None and c in rest:
+                groups.append({a: rest.pop(a), b: rest.pop(b), c: rest.pop(c)})
+                break
+            lookup.setdefault(rest[b], b)
+    return groups, rest
+
+
+def _zero_sum_partition(cents, deadline):
+    # Bitmask DP: best[mask] is the largest number of zero-sum groups the
+    # members in mask can be split into. Each group of k settles in k - 1
+    # transfers, so more groups means fewer transfers.
+    uids = sorted(cents)
+    values = [cents[uid] for uid in uids]
+    size = 1 << len(values)
+
+    sums = [0] * size
+    for mask in range(1, size):
+        low = mask & -mask
+        sums[mask] = sums[mask ^ low] + values[low.bit_length() - 1]
+
+    best = [0] * size
+    for mask in range(1, size):
+        if not mask & 1023:
+            _check_deadline(deadline)
+        top = 0
+        bits = mask
+        while bits:
+            low = bits & -bits
+            if best[mask ^ low] > top:
+                top = best[mask ^ low]
+            bits ^= low
+        best[mask] = top + (sums[mask] == 0)
+
+    groups = []
+    current = {}
+    mask = size - 1
+    while mask:
+        gain = 1 if sums[mask] == 0 else 0
+        bits = mask
+        while bits:
+            low = bits & -bits
+            if best[mask ^ low] == best[mask] - gain:
+                break
+            bits ^= low
+        index = low.bit_length() - 1
+        current[uids[index]] = values[index]
+        mask ^= low
+        if sums[mask] == 0:
+            groups.append(current)
+            current = {}
+    return groups
+
+
+def exact_settlements(net, max_size=None, time_budget_ms=None):
+    if max_size is None:
+        max_size = getattr(settings, "SETTLEMENT_EXACT_MAX_SIZE", 12)
+    if time_budget_ms is None:
+        time_budget_ms = getattr(settings, "SETTLEMENT_TIME_BUDGET_MS", 100)
+    deadline = time.perf_counter() + time_budget_ms / 1000
+
+    groups, rest = _peel_pairs(_nonzero_cents(net))
+    try:
+        if len(rest) > max_size:
+            triples, rest = _peel_triples(rest, deadline)
+            groups.extend(triples)
+        if rest and len(rest) <= max_size:
+            groups.extend(_zero_sum_partition(rest, deadline))
+            rest = {}
+    except _OutOfTime:
+        pass
+
+    # Whatever the exact passes did not split up is settled greedily.
+    transfers = []
+    for group in groups:
+        transfers.extend(_greedy_transfers(group))
+    transfers.extend(_greedy_transfers(rest))
+    return transfers
+
+
+SOLVERS = {
+    "greedy": greedy_settlements,
+    "exact": exact_settlements,
+}
+
+
+def get_settlement_solver():
+    name = getattr(settings, "SETTLEMENT_SOLVER", "exact")
+    if name in SOLVERS:
+        return SOLVERS[name]
+    return import_string(name)
+
+
+def minimize_settlements(net):
+    return get_settlement_solver()(net)
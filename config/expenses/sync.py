@@ -0,0 +1,49 @@
+from .models import Expense, ExpensePayment, ExpenseSplit, GroupMember, Settlement
+
+
+def group_changes(group, since):
+    # group.revision is read before the rows, and every writer bumps it under
+    # the group row lock before stamping its rows, so anything at or below
+    # the returned cursor is already committed and nothing is skipped.
+    cursor = group.revision
+
+    def window(queryset):
+        return queryset.filter(change_seq__gt=since, change_seq__lte=cursor).order_by(
+            "change_seq", "id"
+        )
+
+    return {
+        "since": since,
+        "cursor": cursor,
+        "members": list(
+            window(GroupMember.objects.filter(group=group)).values(
+                "id", "user_id", "user__name", "joined_at", "change_seq"
+            )
+        ),
+        "expenses": list(
+            window(Expense.objects.filter(group=group)).values(
+                "id",
+                "paid_by_id",
+                "amount",
+                "description",
+                "split_type",
+                "created_at",
+                "change_seq",
+            )
+        ),
+        "payments": list(
+            window(ExpensePayment.objects.filter(expense__group=group)).values(
+                "id", "expense_id", "user_id", "amount", "change_seq"
+            )
+        ),
+        "splits": list(
+            window(ExpenseSplit.objects.filter(expense__group=group)).values(
+                "id", "expense_id", "user_id", "share_amount", "change_seq"
+            )
+        ),
+        "settlements": list(
+            window(Settlement.objects.filter(group=group)).values(
+                "id", "from_user_id", "to_user_id", "amount", "note", "date", "change_seq"
+            )
+        ),
+    }
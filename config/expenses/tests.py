@@ -0,0 +1,119 @@
+import random
+import unittest
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from . import engine
+from .balances import aggregate_group_net
+from .management.commands.benchmark_engine import decimal_net, random_ledger
+from .models import Group, GroupMember
+from .solvers import greedy_settlements, minimize_settlements
+
+
+def seed_group(name, members, expenses):
+    call_command(
+        "seed_workload",
+        groups=1,
+        members=members,
+        expenses=expenses,
+        settlements=expenses // 4,
+        prefix=name,
+        stdout=StringIO(),
+    )
+    return Group.objects.select_related("created_by").get(name=f"{name}-0")
+
+
+class GroupSnapshotQueryTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def test_query_count_does_not_grow_with_group_size(self):
+        for members, expenses in ((2, 1), (8, 40), (30, 300)):
+            with self.subTest(members=members, expenses=expenses):
+                group = seed_group(f"snapshot{members}", members, expenses)
+                client = APIClient()
+                client.force_authenticate(group.created_by)
+
+                with self.assertNumQueries(8):
+                    response = client.get(f"/api/groups/{group.id}/snapshot/")
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data["detail"]["members"]), members)
+
+
+class EngineParityTests(SimpleTestCase):
+    def test_to_cents_rounds_like_quantize(self):
+        rng = random.Random(1)
+        for _ in range(5000):
+            amount = Decimal(rng.randint(-10**9, 10**9)).scaleb(-rng.randint(0, 4))
+            with self.subTest(amount=amount):
+                self.assertEqual(
+                    engine.from_cents(engine.to_cents(amount)), amount.quantize(Decimal("0.01"))
+                )
+
+    def _ledger_cents(self):
+        expenses, settlements = random_ledger(20000, 40, random.Random(2))
+        payments = [row for expense_payments, _ in expenses for row in expense_payments]
+        splits = [row for _, expense_splits in expenses for row in expense_splits]
+        expected = decimal_net(payments, splits, settlements)
+        cents = (
+            [(uid, engine.to_cents(amount)) for uid, amount in payments],
+            [(uid, engine.to_cents(amount)) for uid, amount in splits],
+            [(f, t, engine.to_cents(amount)) for f, t, amount in settlements],
+        )
+        return expected, cents
+
+    def _assert_same_net(self, expected, net):
+        self.assertEqual(
+            {uid: engine.from_cents(cents) for uid, cents in net.items() if cents},
+            {uid: amount for uid, amount in expected.items() if amount},
+        )
+
+    def test_net_cents_matches_decimal(self):
+        expected, cents = self._ledger_cents()
+        self._assert_same_net(expected, engine.net_cents(*cents, use_numpy=False))
+
+    @unittest.skipIf(engine.np is None, "numpy is not installed")
+    def test_numpy_net_cents_matches_decimal(self):
+        expected, cents = self._ledger_cents()
+        self._assert_same_net(expected, engine.net_cents(*cents, use_numpy=True))
+
+    def test_solvers_settle_every_cent(self):
+        rng = random.Random(3)
+        for size in (2, 5, 9, 20):
+            amounts = [Decimal(rng.randint(-50000, 50000)).scaleb(-2) for _ in range(size - 1)]
+            net = dict(enumerate(amounts + [-sum(amounts)], 1))
+            for solver in (greedy_settlements, minimize_settlements):
+                with self.subTest(size=size, solver=solver.__name__):
+                    settled = dict(net)
+                    for transfer in solver(net):
+                        amount = Decimal(str(transfer["amount"]))
+                        settled[transfer["from_user"]] += amount
+                        settled[transfer["to_user"]] -= amount
+                    self.assertFalse(any(settled.values()))
+
+
+class StoredLedgerParityTests(TestCase):
+    def test_group_net_cents_matches_sql_totals(self):
+        group = seed_group("parity", 12, 500)
+        member_ids = list(
+            GroupMember.objects.filter(group=group).values_list("user_id", flat=True)
+        )
+        expected = aggregate_group_net(group, member_ids)
+        for use_numpy in (False, True) if engine.np is not None else (False,):
+            with self.subTest(use_numpy=use_numpy):
+                net = engine.load_group_net_cents(group, member_ids, use_numpy=use_numpy)
+                self.assertEqual(
+                    {uid: engine.from_cents(cents) for uid, cents in net.items()}, expected
+                )
+
+    def test_rebuilt_balances_pass_verification(self):
+        seed_group("rebuild", 10, 300)
+        call_command("rebuild_balances", stdout=StringIO())
+        call_command("verify_ledger", stdout=StringIO())
@@ -1,5 +1,6 @@
 from django.urls import path
-from .views import CustomTokenObtainPairView, RegisterView, GroupListCreateView, GroupInviteView, AddExpenseView, GroupExpenseListView, GroupDetailAPIView, GroupBalancesView, GroupSettlementListView
+from . import async_views
+from .views import CustomTokenObtainPairView, RegisterView, GroupListCreateView, GroupInviteView, AddExpenseView, GroupExpenseImportView, GroupExpenseListView, GroupLedgerExportView, GroupDetailAPIView, GroupSnapshotView, GroupBalancesView, GroupSettlementListView, GroupSettleUpView, GroupChangesView, GroupDebtsView, MySummaryView, CacheStatsView
 
 urlpatterns = [
     path('auth/login/', CustomTokenObtainPairView.as_view(), name= 'login'),
@@ -8,7 +9,18 @@ urlpatterns = [
     path('groups/<int:id>/invite', GroupInviteView.as_view()),
     path("expenses/", AddExpenseView.as_view()),
     path("groups/<int:id>/expenses/", GroupExpenseListView.as_view()),
+    path("groups/<int:id>/expenses/import", GroupExpenseImportView.as_view()),
+    path("groups/<int:id>/export/", GroupLedgerExportView.as_view()),
     path("groups/<int:id>/detail/", GroupDetailAPIView.as_view()),
     path("groups/<int:id>/balances/", GroupBalancesView.as_view()),
+    path("groups/<int:id>/snapshot/", GroupSnapshotView.as_view()),
     path("groups/<int:id>/settlements/", GroupSettlementListView.as_view()),
+    path("groups/<int:id>/settlements/batch", GroupSettleUpView.as_view()),
+    path("groups/<int:id>/debts/", GroupDebtsView.as_view()),
+    path("groups/<int:id>/changes", GroupChangesView.as_view()),
+    path("me/summary", MySummaryView.as_view()),
+    path("async/groups/<int:id>/detail/", async_views.group_detail),
+    path("async/groups/<int:id>/expenses/", async_views.group_expenses),
+    path("async/groups/<int:id>/balances/", async_views.group_balances),
+    path("cache/stats/", CacheStatsView.as_view()),
 ]
@@ -1,4 +1,8 @@
 from django.shortcuts import render, get_object_or_404
+from django.http import HttpResponse, StreamingHttpResponse
+from django.db import transaction
+from django.db.models import BooleanField, Count, ExpressionWrapper, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from rest_framework import generics, permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -10,14 +14,75 @@ from .serializers import (
     GroupMemberSerializer,
     JoinGroupSerializer,
     ExpenseSerializer,
+    ExpenseImportRowSerializer,
     GroupDetailSerializer,
     SettlementSerializer,
 )
-from .models import User, Group, GroupMember, Expense, ExpenseSplit, ExpensePayment, Settlement
+from .models import (
+    User,
+    Group,
+    GroupMember,
+    Expense,
+    ExpenseSplit,
+    ExpensePayment,
+    Settlement,
+    MemberBalance,
+)
+from .balances import (
+    aggregate_group_net,
+    apply_balance_deltas,
+    apply_pair_deltas,
+    expense_deltas,
+    expense_pair_deltas,
+    load_member_net,
+    locked_member_net,
+    settlement_deltas,
+    settlement_pair_deltas,
+    user_debts,
+    user_summary,
+)
+from .caching import (
+    bump_group_revision,
+    cached_group_data,
+    etag_matches,
+    group_etag,
+    lock_group,
+    stats as cache_stats,
+)
+from .exports import stream_ledger_csv, stream_ledger_ndjson
+from .imports import iter_import_rows
+from .engine import from_cents, to_cents
+from .ledger import (
+    append_events,
+    expense_event,
+    ledger_net_at,
+    parse_as_of,
+    settlement_event,
+)
+from .membership import (
+    IsGroupMember,
+    group_member_ids,
+    invalidate_group_members,
+    is_group_member,
+)
+from .metrics import registry as metrics
+from .pagination import ExpenseCursorPagination
+from .solvers import minimize_settlements
+from .sync import group_changes
 from decimal import Decimal
 import traceback
 
 
+def with_etag(response, etag):
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def not_modified_response(etag):
+    return with_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
@@ -33,14 +98,34 @@ class GroupListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Group.objects.filter(members__user=self.request.user)
+        user = self.request.user
+        members_total = (
+            GroupMember.objects.filter(group=OuterRef("pk"))
+            .order_by()
+            .values("group")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        caller_net = MemberBalance.objects.filter(group=OuterRef("pk"), user=user).values(
+            "net_amount"
+        )[:1]
+        return Group.objects.filter(members__user=user).annotate(
+            members_total=Coalesce(Subquery(members_total), 0),
+            created_by_caller=ExpressionWrapper(
+                Q(created_by=user), output_field=BooleanField()
+            ),
+            caller_net=Subquery(caller_net),
+        )
 
     def get_serializer_context(self):
         return {"request": self.request}
 
     def perform_create(self, serializer):
-        group = serializer.save(created_by=self.request.user)
-        GroupMember.objects.create(user=self.request.user, group=group)
+        with transaction.atomic():
+            group = serializer.save(created_by=self.request.user)
+            seq = bump_group_revision(group)
+            GroupMember.objects.create(user=self.request.user, group=group, change_seq=seq)
+            invalidate_group_members(group)
 
 
 class JoinGroupView(generics.CreateAPIView):
@@ -53,7 +138,10 @@ class JoinGroupView(generics.CreateAPIView):
     def perform_create(self, serializer):
         group_id = self.request.data.get("group_id")
         group = get_object_or_404(Group, id=group_id)
-        serializer.save(user=self.request.user, group=group)
+        with transaction.atomic():
+            seq = bump_group_revision(group)
+            serializer.save(user=self.request.user, group=group, change_seq=seq)
+            invalidate_group_members(group)
 
 
 class GroupInviteView(APIView):
@@ -83,13 +171,16 @@ class GroupInviteView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        if GroupMember.objects.filter(group=group, user=user).exists():
+        if is_group_member(group, user.id):
             return Response(
                 {"detail": "User is already a member of this group"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        GroupMember.objects.create(group=group, user=user)
+        with transaction.atomic():
+            seq = bump_group_revision(group)
+            GroupMember.objects.create(group=group, user=user, change_seq=seq)
+            invalidate_group_members(group)
 
         return Response(
             {"detail": "User invited successfully"},
@@ -108,52 +199,70 @@ class AddExpenseView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         group = get_object_or_404(Group, id=request.data.get("group"))
+        member_ids = group_member_ids(group)
 
-        if not GroupMember.objects.filter(group=group, user=request.user).exists():
+        if request.user.id not in member_ids:
             return Response(
                 {"detail": "You are not a member of this group"},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        expense = serializer.save(
-            paid_by=request.user,
-            group=group,
-        )
-
         splits = request.data.get("splits", [])
         payments_raw = request.data.get("payments")
+        amount = serializer.validated_data["amount"]
+        split_type = serializer.validated_data["split_type"]
 
         try:
-            self._save_payments(request, group, expense, payments_raw)
-            self.handle_split(expense, splits)
+            payments, expense_splits = self._build_rows(
+                request.user.id, member_ids, amount, split_type, payments_raw, splits
+            )
         except ValueError as e:
-            expense.delete()  # rollback expense
             return Response(
                 {"detail": str(e)},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        with transaction.atomic():
+            seq = bump_group_revision(group)
+            expense = serializer.save(
+                paid_by=request.user,
+                group=group,
+                change_seq=seq,
+            )
+            for row in payments + expense_splits:
+                row.expense = expense
+                row.change_seq = seq
+            ExpensePayment.objects.bulk_create(payments)
+            ExpenseSplit.objects.bulk_create(expense_splits)
+            apply_balance_deltas(group, expense_deltas(payments, expense_splits))
+            apply_pair_deltas(group, expense_pair_deltas(payments, expense_splits))
+            append_events(group, [expense_event(expense, payments, expense_splits)])
+        metrics.inc("expenses_created_total")
+        metrics.inc("expense_splits_written_total", amount=len(expense_splits))
+
         expense = Expense.objects.prefetch_related("payments__user").get(pk=expense.pk)
         return Response(
             ExpenseSerializer(expense).data,
             status=status.HTTP_201_CREATED,
         )
 
-    def _save_payments(self, request, group, expense, payments_raw):
-        member_ids = set(
-            GroupMember.objects.filter(group=group).values_list("user_id", flat=True)
-        )
-        target = expense.amount.quantize(Decimal("0.01"))
+    def _build_rows(self, payer_id, member_ids, amount, split_type, payments_raw, splits):
+        # Every malformed payment or split surfaces as a ValueError, so callers
+        # only have one exception to turn into a client error.
+        try:
+            payments = self._build_payments(payer_id, member_ids, amount, payments_raw)
+            expense_splits = self._build_splits(split_type, amount, member_ids, splits)
+        except KeyError as e:
+            raise ValueError(f"Missing field {e}")
+        except (TypeError, AttributeError, ArithmeticError):
+            raise ValueError("Invalid payment or split values")
+        return payments, expense_splits
 
-        ExpensePayment.objects.filter(expense=expense).delete()
+    def _build_payments(self, payer_id, member_ids, amount, payments_raw):
+        target = amount.quantize(Decimal("0.01"))
 
         if payments_raw is None or payments_raw == []:
-            ExpensePayment.objects.create(
-                expense=expense,
-                user=request.user,
-                amount=target,
-            )
-            return
+            return [ExpensePayment(user_id=payer_id, amount=target)]
 
         merged = {}
         for p in payments_raw:
@@ -181,45 +290,40 @@ class AddExpenseView(APIView):
         if total != target:
             raise ValueError("Sum of payments must equal the expense total")
 
-        for uid, amt in merged.items():
-            ExpensePayment.objects.create(
-                expense=expense,
-                user_id=uid,
-                amount=amt.quantize(Decimal("0.01")),
-            )
-
-    def handle_split(self, expense, splits):
-        members = GroupMember.objects.filter(group=expense.group)
-        member_count = members.count()
-
-        ExpenseSplit.objects.filter(expense=expense).delete()
-
-        if expense.split_type == "equal":
-            share = expense.amount / Decimal(member_count)
-
-            for member in members:
-                ExpenseSplit.objects.create(
-                    expense=expense,
-                    user=member.user,
-                    share_amount=share,
-                )
-
-        elif expense.split_type == "custom":
+        return [
+            ExpensePayment(user_id=uid, amount=amt.quantize(Decimal("0.01")))
+            for uid, amt in merged.items()
+        ]
+
+    def _build_splits(self, split_type, amount, member_ids, splits):
+        if split_type == "equal":
+            # Shares add up to the amount exactly: the first members in join
+            # order take the leftover cents.
+            share, extra = divmod(to_cents(amount), len(member_ids))
+            return [
+                ExpenseSplit(user_id=uid, share_amount=from_cents(share + 1 if index < extra else share))
+                for index, uid in enumerate(member_ids)
+            ]
+
+        if split_type == "custom":
             if not splits:
                 raise ValueError("Splits are required for custom split")
 
-            total = sum(Decimal(s["value"]) for s in splits)
-            if total != expense.amount:
+            values = [Decimal(s["value"]) for s in splits]
+            if any(value != value.quantize(Decimal("0.01")) for value in values):
+                raise ValueError("Custom split values can have at most 2 decimal places")
+            if sum(values) != amount:
                 raise ValueError("Custom split total must equal expense amount")
 
-            for s in splits:
-                ExpenseSplit.objects.create(
-                    expense=expense,
-                    user_id=s["user"],
-                    share_amount=Decimal(s["value"]),
+            return [
+                ExpenseSplit(
+                    user_id=self._split_user_id(s, member_ids),
+                    share_amount=value.quantize(Decimal("0.01")),
                 )
+                for s, value in zip(splits, values)
+            ]
 
-        elif expense.split_type == "percentage":
+        if split_type == "percentage":
             if not splits:
                 raise ValueError("Splits are required for percentage split")
 
@@ -227,55 +331,222 @@ class AddExpenseView(APIView):
             if total_percent != 100:
                 raise ValueError("Percentage split must total 100%")
 
-            for s in splits:
-                share = (Decimal(s["value"]) / 100) * expense.amount
-                ExpenseSplit.objects.create(
-                    expense=expense,
-                    user_id=s["user"],
-                    share_amount=share,
+            expense_splits = [
+                ExpenseSplit(
+                    user_id=self._split_user_id(s, member_ids),
+                    share_amount=((Decimal(s["value"]) / 100) * amount).quantize(Decimal("0.01")),
                 )
+                for s in splits
+            ]
+            # The largest share absorbs the rounding so shares add up to the amount.
+            largest = max(expense_splits, key=lambda split: split.share_amount)
+            largest.share_amount += amount - sum(split.share_amount for split in expense_splits)
+            return expense_splits
 
-        else:
-            raise ValueError("Invalid split type")
+        raise ValueError("Invalid split type")
+
+    def _split_user_id(self, split, member_ids):
+        try:
+            uid = int(split["user"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Each split requires a user id")
+        if uid not in member_ids:
+            raise ValueError("All split users must be members of this group")
+        return uid
+
+
+class GroupExpenseImportView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsGroupMember]
+    chunk_size = 500
+    max_reported_errors = 1000
+
+    def post(self, request, id):
+        group = get_object_or_404(Group, id=id)
+        self.check_object_permissions(request, group)
+        member_ids = group_member_ids(group)
+
+        if request.stream is None:
+            return Response(
+                {"detail": "Request body is empty"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        rows = iter_import_rows(request.stream, request.content_type)
+        if rows is None:
+            return Response(
+                {"detail": "Send text/csv or application/x-ndjson"},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        imported = 0
+        failed = 0
+        errors = []
+        chunk = []
+
+        for row_num, row in rows:
+            try:
+                chunk.append(self._build_row(request.user.id, member_ids, row))
+            except ValueError as e:
+                failed += 1
+                if len(errors) < self.max_reported_errors:
+                    errors.append({"row": row_num, "errors": e.args[0]})
+                continue
+
+            if len(chunk) >= self.chunk_size:
+                imported += self._write_chunk(group, chunk)
+                chunk = []
+
+        if chunk:
+            imported += self._write_chunk(group, chunk)
+
+        return Response(
+            {"imported": imported, "failed": failed, "errors": errors},
+            status=status.HTTP_201_CREATED if imported else status.HTTP_400_BAD_REQUEST,
+        )
+
+    def _build_row(self, payer_id, member_ids, row):
+        if isinstance(row, Exception):
+            raise ValueError(str(row))
+
+        serializer = ExpenseImportRowSerializer(data=row)
+        if not serializer.is_valid():
+            raise ValueError(serializer.errors)
+
+        amount = serializer.validated_data["amount"]
+        split_type = serializer.validated_data["split_type"]
+        payments, splits = AddExpenseView()._build_rows(
+            payer_id,
+            member_ids,
+            amount,
+            split_type,
+            serializer.validated_data.get("payments"),
+            serializer.validated_data.get("splits"),
+        )
+
+        expense = Expense(
+            paid_by_id=payer_id,
+            description=serializer.validated_data["description"],
+            amount=amount,
+            split_type=split_type,
+        )
+        return expense, payments, splits
+
+    def _write_chunk(self, group, chunk):
+        with transaction.atomic():
+            seq = bump_group_revision(group)
+            expenses = [expense for expense, _, _ in chunk]
+            for expense in expenses:
+                expense.group = group
+                expense.change_seq = seq
+            Expense.objects.bulk_create(expenses)
+
+            payments = []
+            splits = []
+            pair_deltas = {}
+            for expense, expense_payments, expense_splits in chunk:
+                for row in expense_payments + expense_splits:
+                    row.expense = expense
+                    row.change_seq = seq
+                payments.extend(expense_payments)
+                splits.extend(expense_splits)
+                for key, amount in expense_pair_deltas(expense_payments, expense_splits).items():
+                    pair_deltas[key] = pair_deltas.get(key, Decimal("0.00")) + amount
+
+            ExpensePayment.objects.bulk_create(payments)
+            ExpenseSplit.objects.bulk_create(splits)
+            apply_balance_deltas(group, expense_deltas(payments, splits))
+            apply_pair_deltas(group, pair_deltas)
+            append_events(
+                group,
+                [
+                    expense_event(expense, expense_payments, expense_splits)
+                    for expense, expense_payments, expense_splits in chunk
+                ],
+            )
+        metrics.inc("expenses_created_total", amount=len(chunk))
+        metrics.inc("expense_splits_written_total", amount=len(splits))
+        return len(chunk)
 
 
 class GroupExpenseListView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, IsGroupMember]
 
     def get(self, request, id):
         group = get_object_or_404(Group, id=id)
 
-        if not GroupMember.objects.filter(group=group, user=request.user).exists():
+        self.check_object_permissions(request, group)
+
+        etag = group_etag(group, "expenses", request)
+        if etag_matches(request, etag):
+            return not_modified_response(etag)
+
+        expenses = Expense.objects.filter(group=group).prefetch_related("payments__user")
+
+        paginator = ExpenseCursorPagination(request)
+        if not paginator.is_requested():
+            serializer = ExpenseSerializer(expenses.order_by("-created_at"), many=True)
+            return with_etag(Response(serializer.data), etag)
+
+        try:
+            page, next_cursor = paginator.paginate(expenses)
+        except ValueError as e:
             return Response(
-                {"detail": "Not a group member"},
-                status=status.HTTP_403_FORBIDDEN,
+                {"detail": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        expenses = (
-            Expense.objects.filter(group=group)
-            .order_by("-created_at")
-            .prefetch_related("payments__user")
+        response = Response(
+            {
+                "results": ExpenseSerializer(page, many=True).data,
+                "next_cursor": next_cursor,
+            }
         )
-        serializer = ExpenseSerializer(expenses, many=True)
-        return Response(serializer.data)
+        return with_etag(response, etag)
 
 
 
-class GroupDetailAPIView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
+class GroupLedgerExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsGroupMember]
 
     def get(self, request, id):
         group = get_object_or_404(Group, id=id)
 
-        if not GroupMember.objects.filter(group=group, user=request.user).exists():
+        self.check_object_permissions(request, group)
+
+        output = request.query_params.get("output", "csv")
+        if output == "csv":
+            response = StreamingHttpResponse(stream_ledger_csv(group), content_type="text/csv")
+        elif output == "ndjson":
+            response = StreamingHttpResponse(
+                stream_ledger_ndjson(group), content_type="application/x-ndjson"
+            )
+        else:
             return Response(
-                {"detail": "Not a group member"},
-                status=status.HTTP_403_FORBIDDEN,
+                {"detail": "output must be csv or ndjson"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
+        response["Content-Disposition"] = f'attachment; filename="group-{group.id}-ledger.{output}"'
+        return response
+
+
+class GroupDetailAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsGroupMember]
+
+    def get(self, request, id):
+        group = get_object_or_404(Group, id=id)
+
+        self.check_object_permissions(request, group)
+
+        etag = group_etag(group, "detail", request)
+        if etag_matches(request, etag):
+            return not_modified_response(etag)
+
         try:
-            serializer = GroupDetailSerializer(group)
-            return Response(serializer.data)
+            data = cached_group_data(
+                group, "detail", lambda: GroupDetailSerializer(group).data
+            )
+            return with_etag(Response(data), etag)
         except Exception as e:
             print("Group detail error:", e)
             print(traceback.format_exc())
@@ -285,25 +556,117 @@ class GroupDetailAPIView(APIView):
             )
 
 
-class GroupBalancesView(APIView):
+class GroupSnapshotView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, id):
         group = get_object_or_404(Group, id=id)
+        members = list(GroupMember.objects.filter(group=group).select_related("user"))
 
-        if not GroupMember.objects.filter(group=group, user=request.user).exists():
+        if not any(member.user_id == request.user.id for member in members):
             return Response(
                 {"detail": "Not a group member"},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        members = GroupMember.objects.filter(group=group).select_related("user")
-        net, users = self._compute_group_net(group, members)
+        etag = group_etag(group, "snapshot", request)
+        if etag_matches(request, etag):
+            return not_modified_response(etag)
 
-        settlements = self._minimize_settlements(net)
+        try:
+            page, next_cursor = ExpenseCursorPagination(request).paginate(
+                Expense.objects.filter(group=group).prefetch_related("payments__user")
+            )
+        except ValueError as e:
+            return Response(
+                {"detail": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        detail = cached_group_data(
+            group,
+            "detail",
+            lambda: GroupDetailSerializer(group, context={"members": members}).data,
+        )
+        balances = cached_group_data(
+            group,
+            "balances",
+            lambda: GroupBalancesView()._build_balances(group, members),
+        )
+        response = Response(
+            {
+                "detail": detail,
+                "expenses": {
+                    "results": ExpenseSerializer(page, many=True).data,
+                    "next_cursor": next_cursor,
+                },
+                "balances": balances,
+            }
+        )
+        return with_etag(response, etag)
+
+
+class GroupBalancesView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsGroupMember]
+
+    def get(self, request, id):
+        group = get_object_or_404(Group, id=id)
+
+        self.check_object_permissions(request, group)
+
+        as_of = request.query_params.get("as_of")
+        if as_of is not None:
+            try:
+                as_of = parse_as_of(as_of)
+            except ValueError as e:
+                return Response(
+                    {"detail": str(e)},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        etag = group_etag(group, "balances", request)
+        if etag_matches(request, etag):
+            return not_modified_response(etag)
+
+        if as_of is None:
+            data = cached_group_data(group, "balances", lambda: self._build_balances(group))
+        else:
+            data = cached_group_data(
+                group,
+                f"balances@{as_of.isoformat()}",
+                lambda: self._build_balances_as_of(group, as_of),
+            )
+        return with_etag(Response(data), etag)
+
+    def _build_balances(self, group, members=None):
+        if members is None:
+            members = GroupMember.objects.filter(group=group).select_related("user")
+        net = load_member_net(group, members)
         settlement_history = Settlement.objects.filter(group=group).select_related(
             "from_user", "to_user"
         )
+        return self._balances_payload(group, members, net, settlement_history)
+
+    def _build_balances_as_of(self, group, as_of):
+        # The closest ledger snapshot plus at most one interval of events, so
+        # an old as_of costs about as much as a recent one.
+        _, cents = ledger_net_at(group, as_of)
+        members = [
+            member
+            for member in GroupMember.objects.filter(group=group).select_related("user")
+            if member.joined_at <= as_of or cents.get(member.user_id)
+        ]
+        net = {member.user_id: from_cents(cents.get(member.user_id, 0)) for member in members}
+        settlement_history = Settlement.objects.filter(group=group, date__lte=as_of).select_related(
+            "from_user", "to_user"
+        )
+        data = self._balances_payload(group, members, net, settlement_history)
+        data["as_of"] = as_of.isoformat()
+        return data
+
+    def _balances_payload(self, group, members, net, settlement_history):
+        users = {member.user_id: member.user for member in members}
+        settlements = self._minimize_settlements(net)
 
         balances = []
         for user_id, balance in net.items():
@@ -316,170 +679,186 @@ class GroupBalancesView(APIView):
                 }
             )
 
-        return Response(
-            {
-                "group_id": group.id,
-                "group_name": group.name,
-                "currency": group.currency,
-                "balances": balances,
-                "settlements": settlements,
-                "settlement_history": SettlementSerializer(settlement_history, many=True).data,
-            }
-        )
+        return {
+            "group_id": group.id,
+            "group_name": group.name,
+            "currency": group.currency,
+            "balances": balances,
+            "settlements": settlements,
+            "settlement_history": SettlementSerializer(settlement_history, many=True).data,
+        }
 
     def _compute_group_net(self, group, members=None):
         if members is None:
             members = GroupMember.objects.filter(group=group).select_related("user")
 
-        net = {member.user_id: Decimal("0.00") for member in members}
         users = {member.user_id: member.user for member in members}
-
-        payments = ExpensePayment.objects.filter(expense__group=group).select_related("user")
-        for payment in payments:
-            uid = payment.user_id
-            net[uid] = net.get(uid, Decimal("0.00")) + payment.amount
-
-        splits = ExpenseSplit.objects.filter(expense__group=group).select_related("user")
-        for split in splits:
-            uid = split.user_id
-            net[uid] = net.get(uid, Decimal("0.00")) - split.share_amount
-
-        
-        paid_settlements = Settlement.objects.filter(group=group)
-        for settlement in paid_settlements:
-            net[settlement.from_user_id] = (
-                net.get(settlement.from_user_id, Decimal("0.00")) + settlement.amount
-            )
-            net[settlement.to_user_id] = (
-                net.get(settlement.to_user_id, Decimal("0.00")) - settlement.amount
-            )
-
+        net = aggregate_group_net(group, users.keys())
         return net, users
 
     def _minimize_settlements(self, net):
-        creditors = []
-        debtors = []
+        return minimize_settlements(net)
 
-        for user_id, balance in net.items():
-            rounded = balance.quantize(Decimal("0.01"))
-            if rounded > 0:
-                creditors.append([user_id, rounded])
-            elif rounded < 0:
-                debtors.append([user_id, -rounded])
-
-        i = 0
-        j = 0
-        optimized = []
-
-        while i < len(debtors) and j < len(creditors):
-            debtor_id, owes = debtors[i]
-            creditor_id, gets = creditors[j]
-            amount = min(owes, gets).quantize(Decimal("0.01"))
-
-            if amount > 0:
-                optimized.append(
-                    {
-                        "from_user": debtor_id,
-                        "to_user": creditor_id,
-                        "amount": float(amount),
-                    }
-                )
-
-            debtors[i][1] = (owes - amount).quantize(Decimal("0.01"))
-            creditors[j][1] = (gets - amount).quantize(Decimal("0.01"))
-
-            if debtors[i][1] == 0:
-                i += 1
-            if creditors[j][1] == 0:
-                j += 1
 
-        return optimized
+def _reject_settlement(reason, detail, status_code):
+    metrics.inc("settlements_rejected_total", (("reason", reason),))
+    return Response({"detail": detail}, status=status_code)
 
 
 def create_settlement_response(request, group, to_user_id, amount_raw, note_raw=None):
     
-    if not GroupMember.objects.filter(group=group, user=request.user).exists():
-        return Response(
-            {"detail": "Not a group member"},
-            status=status.HTTP_403_FORBIDDEN,
+    if not is_group_member(group, request.user.id):
+        return _reject_settlement(
+            "not_member", "Not a group member", status.HTTP_403_FORBIDDEN
         )
 
     if to_user_id is None or amount_raw is None:
-        return Response(
-            {"detail": "to_user and amount are required"},
-            status=status.HTTP_400_BAD_REQUEST,
+        return _reject_settlement(
+            "missing_fields", "to_user and amount are required", status.HTTP_400_BAD_REQUEST
         )
 
     try:
         to_user_id = int(to_user_id)
     except (TypeError, ValueError):
-        return Response(
-            {"detail": "to_user must be a valid user id"},
-            status=status.HTTP_400_BAD_REQUEST,
+        return _reject_settlement(
+            "invalid_recipient", "to_user must be a valid user id", status.HTTP_400_BAD_REQUEST
         )
 
-    if not GroupMember.objects.filter(group=group, user_id=to_user_id).exists():
-        return Response(
-            {"detail": "Recipient must be in the same group"},
-            status=status.HTTP_400_BAD_REQUEST,
+    if not is_group_member(group, to_user_id):
+        return _reject_settlement(
+            "recipient_not_member", "Recipient must be in the same group", status.HTTP_400_BAD_REQUEST
         )
 
     if to_user_id == request.user.id:
-        return Response(
-            {"detail": "You cannot settle with yourself"},
-            status=status.HTTP_400_BAD_REQUEST,
+        return _reject_settlement(
+            "self_settlement", "You cannot settle with yourself", status.HTTP_400_BAD_REQUEST
         )
 
     try:
         amount = Decimal(str(amount_raw)).quantize(Decimal("0.01"))
     except Exception:
-        return Response(
-            {"detail": "Invalid settlement amount"},
-            status=status.HTTP_400_BAD_REQUEST,
+        return _reject_settlement(
+            "invalid_amount", "Invalid settlement amount", status.HTTP_400_BAD_REQUEST
         )
 
     if amount <= 0:
-        return Response(
-            {"detail": "Settlement amount must be positive"},
-            status=status.HTTP_400_BAD_REQUEST,
+        return _reject_settlement(
+            "non_positive_amount", "Settlement amount must be positive", status.HTTP_400_BAD_REQUEST
         )
 
     note = ""
     if note_raw is not None:
         note = str(note_raw).strip()[:255]
 
-    net, _ = GroupBalancesView()._compute_group_net(group)
-    payer_balance = net.get(request.user.id, Decimal("0.00")).quantize(Decimal("0.01"))
-    receiver_balance = net.get(to_user_id, Decimal("0.00")).quantize(Decimal("0.01"))
+    with transaction.atomic():
+        # Lock both ledger rows so concurrent settlements validate against
+        # each other instead of against the same stale balances.
+        lock_group(group)
+        net = locked_member_net(group, [request.user.id, to_user_id])
+        payer_balance = net.get(request.user.id, Decimal("0.00"))
+        receiver_balance = net.get(to_user_id, Decimal("0.00"))
+
+        if payer_balance >= 0:
+            return _reject_settlement(
+                "payer_not_in_debt", "You do not owe money in this group", status.HTTP_400_BAD_REQUEST
+            )
+        if receiver_balance <= 0:
+            return _reject_settlement(
+                "receiver_not_owed", "Selected user is not owed money", status.HTTP_400_BAD_REQUEST
+            )
 
-    if payer_balance >= 0:
-        return Response(
-            {"detail": "You do not owe money in this group"},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
-    if receiver_balance <= 0:
-        return Response(
-            {"detail": "Selected user is not owed money"},
-            status=status.HTTP_400_BAD_REQUEST,
+        max_allowed = min(-payer_balance, receiver_balance).quantize(Decimal("0.01"))
+        if amount > max_allowed:
+            return _reject_settlement(
+                "exceeds_pending",
+                f"Amount exceeds pending settlement. Max allowed: {max_allowed}",
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        seq = bump_group_revision(group)
+        settlement = Settlement.objects.create(
+            group=group,
+            from_user=request.user,
+            to_user_id=to_user_id,
+            amount=amount,
+            note=note,
+            change_seq=seq,
         )
+        apply_balance_deltas(group, settlement_deltas(settlement))
+        apply_pair_deltas(group, settlement_pair_deltas(settlement))
+        append_events(group, [settlement_event(settlement)])
+    metrics.inc("settlements_created_total")
+    return Response(SettlementSerializer(settlement).data, status=status.HTTP_201_CREATED)
+
+
+class GroupChangesView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsGroupMember]
+
+    def get(self, request, id):
+        group = get_object_or_404(Group, id=id)
+
+        self.check_object_permissions(request, group)
+
+        try:
+            since = int(request.query_params.get("since", 0))
+        except (TypeError, ValueError):
+            since = -1
+        if since < 0:
+            return Response(
+                {"detail": "since must be a non-negative integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(group_changes(group, since))
+
+
+class GroupDebtsView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsGroupMember]
+
+    def get(self, request, id):
+        group = get_object_or_404(Group, id=id)
+
+        self.check_object_permissions(request, group)
+
+        you_owe = []
+        owed_to_you = []
+        for debt in user_debts(group, request.user):
+            if debt.debtor_id == request.user.id:
+                you_owe.append(
+                    {"user_id": debt.creditor_id, "name": debt.creditor.name, "amount": float(debt.amount)}
+                )
+            else:
+                owed_to_you.append(
+                    {"user_id": debt.debtor_id, "name": debt.debtor.name, "amount": float(debt.amount)}
+                )
 
-    max_allowed = min(-payer_balance, receiver_balance).quantize(Decimal("0.01"))
-    if amount > max_allowed:
         return Response(
             {
-                "detail": f"Amount exceeds pending settlement. Max allowed: {max_allowed}"
-            },
-            status=status.HTTP_400_BAD_REQUEST,
+                "group_id": group.id,
+                "currency": group.currency,
+                "you_owe": you_owe,
+                "owed_to_you": owed_to_you,
+            }
         )
 
-    settlement = Settlement.objects.create(
-        group=group,
-        from_user=request.user,
-        to_user_id=to_user_id,
-        amount=amount,
-        note=note,
-    )
-    return Response(SettlementSerializer(settlement).data, status=status.HTTP_201_CREATED)
+
+class MySummaryView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response(user_summary(request.user))
+
+
+class CacheStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats.snapshot())
+
+
+def metrics_view(request):
+    # Plain Django view so scrapes skip DRF authentication and content negotiation.
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 class GroupSettlementListView(APIView):
@@ -487,6 +866,10 @@ class GroupSettlementListView(APIView):
 
     def post(self, request, id):
         group = get_object_or_404(Group, id=id)
+        if not isinstance(request.data, dict):
+            return _reject_settlement(
+                "invalid_body", "Request body must be an object", status.HTTP_400_BAD_REQUEST
+            )
         return create_settlement_response(
             request,
             group,
@@ -494,3 +877,137 @@ class GroupSettlementListView(APIView):
             request.data.get("amount"),
             request.data.get("note"),
         )
+
+
+class GroupSettleUpView(APIView):
+    # Records the suggested settlement plan, or the requested part of it, in
+    # one transaction. Members may record transfers they pay or receive; the
+    # group creator may record any of them.
+    permission_classes = [permissions.IsAuthenticated, IsGroupMember]
+
+    def post(self, request, id):
+        group = get_object_or_404(Group, id=id)
+        self.check_object_permissions(request, group)
+
+        if not isinstance(request.data, dict):
+            return _reject_settlement(
+                "invalid_body", "Request body must be an object", status.HTTP_400_BAD_REQUEST
+            )
+
+        requested = request.data.get("transfers")
+        if requested is not None and not isinstance(requested, list):
+            return _reject_settlement(
+                "invalid_transfers", "transfers must be a list", status.HTTP_400_BAD_REQUEST
+            )
+
+        note = str(request.data.get("note") or "").strip()[:255]
+        member_ids = group_member_ids(group)
+        can_record_all = group.created_by_id == request.user.id
+
+        with transaction.atomic():
+            lock_group(group)
+            net = dict.fromkeys(member_ids, Decimal("0.00"))
+            net.update(locked_member_net(group, member_ids))
+            plan = {
+                (t["from_user"], t["to_user"]): Decimal(str(t["amount"])).quantize(Decimal("0.01"))
+                for t in minimize_settlements(net)
+            }
+
+            if requested is None:
+                transfers = [
+                    (from_id, to_id, amount)
+                    for (from_id, to_id), amount in plan.items()
+                    if can_record_all or request.user.id in (from_id, to_id)
+                ]
+            else:
+                try:
+                    transfers = self._pick_transfers(requested, plan)
+                except ValueError as e:
+                    return _reject_settlement("invalid_transfer", str(e), status.HTTP_400_BAD_REQUEST)
+
+            if not can_record_all and any(
+                request.user.id not in (from_id, to_id) for from_id, to_id, _ in transfers
+            ):
+                return _reject_settlement(
+                    "not_party",
+                    "Only the group creator can record transfers between other members",
+                    status.HTTP_403_FORBIDDEN,
+                )
+            if not transfers:
+                return _reject_settlement(
+                    "nothing_to_settle", "Nothing to settle", status.HTTP_400_BAD_REQUEST
+                )
+
+            seq = bump_group_revision(group)
+            settlements = Settlement.objects.bulk_create(
+                [
+                    Settlement(
+                        group=group,
+                        from_user_id=from_id,
+                        to_user_id=to_id,
+                        amount=amount,
+                        note=note,
+                        change_seq=seq,
+                    )
+                    for from_id, to_id, amount in transfers
+                ]
+            )
+
+            deltas = {}
+            pair_deltas = {}
+            for settlement in settlements:
+                for uid, amount in settlement_deltas(settlement).items():
+                    deltas[uid] = deltas.get(uid, Decimal("0.00")) + amount
+                for key, amount in settlement_pair_deltas(settlement).items():
+                    pair_deltas[key] = pair_deltas.get(key, Decimal("0.00")) + amount
+            apply_balance_deltas(group, deltas)
+            apply_pair_deltas(group, pair_deltas)
+            append_events(group, [settlement_event(settlement) for settlement in settlements])
+
+        metrics.inc("settlements_created_total", amount=len(settlements))
+        balances = cached_group_data(
+            group, "balances", lambda: GroupBalancesView()._build_balances(group)
+        )
+        return Response(
+            {
+                "settlements": SettlementSerializer(
+                    Settlement.objects.filter(group=group, change_seq=seq)
+                    .select_related("from_user", "to_user")
+                    .order_by("id"),
+                    many=True,
+                ).data,
+                "balances": balances,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    def _pick_transfers(self, requested, plan):
+        transfers = []
+        seen = set()
+        for item in requested:
+            try:
+                key = (int(item["from_user"]), int(item["to_user"]))
+            except (KeyError, TypeError, ValueError):
+                raise ValueError("Each transfer requires from_user and to_user")
+            if key not in plan:
+                raise ValueError(
+                    f"Transfer from {key[0]} to {key[1]} is not in the suggested settlement plan"
+                )
+            if key in seen:
+                raise ValueError(f"Transfer from {key[0]} to {key[1]} is listed more than once")
+            seen.add(key)
+
+            amount = plan[key]
+            if item.get("amount") is not None:
+                try:
+                    amount = Decimal(str(item["amount"])).quantize(Decimal("0.01"))
+                except Exception:
+                    raise ValueError("Invalid settlement amount")
+                if amount <= 0:
+                    raise ValueError("Settlement amount must be positive")
+                if amount > plan[key]:
+                    raise ValueError(
+                        f"Amount exceeds pending settlement. Max allowed: {plan[key]}"
+                    )
+            transfers.append((key[0], key[1], amount))
+        return transfers